@@ -1,104 +1,79 @@
-import time
 from datetime import datetime
-from threading import Thread
-from watchdog.observers import Observer
-from NextLesson import fetch_data, excel_time_to_datetime, FindNextLesson, get_next_lesson
-from config import SAVE_LOCK_FILE
-import os
+from lesson_cache import LessonCache
+from change_journal import ChangeJournalReader
+from schedule_snapshot import ScheduleSnapshot
+from lesson_scheduler import LessonScheduler
+from lock_monitor import LockFileMonitor, SAVE_FINISHED
 
 
-class CurrentLesson(FindNextLesson):
+class CurrentLesson:
     """
-    Handles determining the lesson currently in session by inheriting methods from NextLesson.
-    Synchronizes with NextLesson to ensure data consistency.
+    Handles determining the lesson currently in session.
+    Sleeps until the next lesson boundary and wakes early only when a save reinitializes the data.
     """
-    def __init__(self):
-        super().__init__()
+    def __init__(self, clock=None, cache=None):
         self.current_lesson = None
-        self.lessons = fetch_data()  # Initialize the shared array of lessons
-        self.lock_file_thread = Thread(target=self._watch_lock_file, daemon=True)
-        self.lock_file_thread.start()
-
-    def _watch_lock_file(self):
+        self.owns_cache = cache is None  # A shared cache is reloaded by its owner (see lesson_daemon)
+        self.cache = cache or LessonCache(journal=ChangeJournalReader(consumer="CurrentLesson"), snapshot=ScheduleSnapshot())
+        if not self.cache.loaded:
+            self.cache.load()
+        self.lessons = self.cache.lessons  # Shared array of lessons, patched in place on reload
+        self.scheduler = LessonScheduler(
+            lambda: self.cache.schedule,
+            clock=clock,
+            on_lesson_start=self._on_lesson_start,
+            on_lesson_end=self._on_lesson_end,
+            on_data_changed=self._on_data_changed,
+        )
+        self.lock_monitor = None
+
+    def _on_lock_event(self, event):
         """
-        Watches the SAVE_LOCK_FILE and reinitializes lesson data when the file is detected.
+        Wakes the scheduler once the autosave lock file has been removed.
         """
-        observer = Observer()
-        observer.schedule(self, os.path.dirname(SAVE_LOCK_FILE), recursive=False)
+        if event == SAVE_FINISHED:
+            self.scheduler.notify_changed()
 
-        try:
-            print("Starting lock file monitor...")
-            observer.start()
-            observer.join()  # Keep the thread running indefinitely
-        except KeyboardInterrupt:
-            print("Stopping lock file monitor...")
-            observer.stop()
-        observer.join()
+    def _on_lesson_start(self, lesson, end_time):
+        self.current_lesson = lesson
+        print(f"Current lesson in session: {lesson.name} on {lesson.weekday}. Ends at {end_time.strftime('%I:%M %p')}.")
+
+    def _on_lesson_end(self, lesson, now):
+        self.current_lesson = None
+        found = self.cache.schedule.next_lesson(now)
+        if found:
+            next_lesson, next_start = found
+            print(f"No lesson in session. Next lesson: {next_lesson.name} at {next_start.strftime('%A %I:%M %p')}.")
+        else:
+            print("No upcoming lessons.")
+
+    def _on_data_changed(self):
+        if self.owns_cache:
+            print("Lock file removed. Reinitializing data...")
+            self.cache.reload()
 
     def get_current_lesson(self):
         """
         Determines the lesson currently in session, if any.
         If a lesson is in session, returns its details; otherwise, returns None.
         """
-        now = datetime.now()
+        found = self.cache.schedule.lesson_at(datetime.now())
+        return found[0] if found else None
 
-        for lesson in self.lessons:
-            start_time = excel_time_to_datetime(lesson["start_time"], lesson["weekday"])
-            end_time = excel_time_to_datetime(lesson["end_time"], lesson["weekday"])
-
-            # Check if the current time is within the lesson's start and end times
-            if start_time <= now < end_time:
-                return lesson
-
-        return None
-
-    def monitor_current_lesson(self):
+    def monitor_current_lesson(self, until=None):
         """
         Main loop to monitor and handle the current lesson.
-        Synchronizes with NextLesson's array and handles lock file detection.
+        Reinitializes the shared lessons array after every save.
         """
-        while True:
-            # Find the current lesson
-            self.current_lesson = self.get_current_lesson()
-
-            if self.current_lesson:
-                # Current lesson is in session
-                end_time = excel_time_to_datetime(self.current_lesson["end_time"], self.current_lesson["weekday"])
-                print(f"Current lesson in session: {self.current_lesson['name']} on {self.current_lesson['weekday']}. Ends at {end_time.strftime('%I:%M %p')}.")
-
-                # Sleep until the lesson ends or a lock file is detected
-                while datetime.now() < end_time:
-                    if self.lock_detected:
-                        print("Lock file detected during lesson session. Reinitializing data...")
-                        self.lessons = fetch_data()
-                        self.lock_detected = False
-                        break
-                    time.sleep(1)  # Sleep in 1-second increments
-
-            else:
-                # No lesson in session
-                next_lesson = get_next_lesson()
-
-                if next_lesson:
-                    next_lesson_start = excel_time_to_datetime(next_lesson["start_time"], next_lesson["weekday"])
-
-                    # Calculate sleep duration until the next lesson starts
-                    sleep_duration = max(0, (next_lesson_start - datetime.now()).total_seconds())
-                    print(f"No lesson in session. Sleeping for {sleep_duration:.2f} seconds until the next lesson starts.")
-
-                    # Sleep until the next lesson starts, breaking if a lock file is detected
-                    start_time = datetime.now()
-                    while (datetime.now() - start_time).total_seconds() < sleep_duration:
-                        if self.lock_detected:
-                            print("Lock file detected during sleep period. Reinitializing data...")
-                            self.lessons = fetch_data()
-                            self.lock_detected = False
-                            break
-                        time.sleep(1)
-
-                else:
-                    print("No upcoming lessons. Rechecking in 10 seconds...")
-                    time.sleep(10)  # Check for lessons again after 10 seconds
+        self.lock_monitor = LockFileMonitor()
+        self.lock_monitor.subscribe(self._on_lock_event)
+        self.lock_monitor.start()
+        try:
+            self.scheduler.run(until=until)
+        except KeyboardInterrupt:
+            print("Stopping current lesson monitor...")
+        finally:
+            self.lock_monitor.stop()
 
 
 if __name__ == "__main__":
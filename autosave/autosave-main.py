@@ -1,13 +1,10 @@
 import time
 import os
 from pathlib import Path
-import xlwings as xw
 import logging
 import sys
-from datetime import datetime
-import shutil
 import signal
-from threading import Thread, Lock, current_thread, Event
+from threading import Event
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -15,7 +12,18 @@ from watchdog.events import FileSystemEventHandler
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)  # Add the parent directory to the Python path
 # Import the configuration file
-from config import EXCEL_FILE, TEMP_DIR, SAVE_TRIGGER_FILE, activate_debug_mode, STATE_FILE_PATH
+from config import EXCEL_FILE, SAVE_LOCK_FILE, SAVE_TRIGGER_FILE, activate_debug_mode, STATE_FILE_PATH, FILE_READER_BACKEND, READ_LOCK_TIMEOUT, get_workbook_and_sheet, get_workbook_backend
+from save_machine import SaveStateMachine, RETRY
+from readiness import ReadinessMonitor
+from save_generation import SaveGeneration
+from backup_store import BackupStore
+from post_save import PostSavePipeline
+from file_lock import FileRWLock
+from lesson_cache import LessonCache
+from schedule_snapshot import ScheduleSnapshotWriter, source_stamp
+from queue_logging import setup_logging, stop_logging
+from log_archiver import LogArchiver
+from trigger_channel import TriggerChannel, EDIT, READY
 
 # Paths for logging and archiving
 logs_folder = Path("logs")
@@ -26,21 +34,29 @@ past_logs_folder.mkdir(parents=True, exist_ok=True)
 # Define the current log file path
 current_log_file = logs_folder / "autosave.log"
 
-# Logging setup
+# Logging setup (file writes happen on the queue listener thread, never in the save path)
+# Rolled and finished logs are compressed into past_logs_folder in the background
+log_archiver = LogArchiver("Autosave", past_logs_folder)
 if activate_debug_mode:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.FileHandler(current_log_file, mode="w")],
-    )
+    setup_logging(current_log_file, level=logging.INFO, fmt="%(asctime)s - %(levelname)s - %(message)s", archiver=log_archiver)
 
 # Path to the lock file
-lock_file_path = Path(TEMP_DIR) / "autosave.lock"
+lock_file_path = Path(SAVE_LOCK_FILE)
+save_generation = SaveGeneration()
+save_stats = {"performed": 0, "skipped": 0, "failed": 0}
+backup_store = BackupStore()
+snapshot_cache = LessonCache(backend=FILE_READER_BACKEND)  # Lessons of the saved file, re-read incrementally
+snapshot_writer = ScheduleSnapshotWriter()
+snapshot_lock = FileRWLock()  # Shared while the snapshot hook reads the saved file
+backup_lock = FileRWLock()  # Shared while the backup hook copies the saved file
+post_save_workers = 4  # Thread pool size for post-save hooks
+
+# Excel readiness, tracked from the statusbar state file written by the VBA
+readiness = ReadinessMonitor(STATE_FILE_PATH)
 
 # Global debounce variables
-debounce_time = 10  # Seconds
-debounce_lock = Lock()
-debounce_timer = None
+debounce_time = 10  # Seconds of quiet before a save
+debounce_max_wait = 60  # Seconds a burst of triggers may postpone the save
 stop_flag = Event()  # Signal for threads to exit cleanly
 
 
@@ -58,17 +74,20 @@ def archive_current_log():
     if not activate_debug_mode:
         return
     try:
-        timestamp = datetime.now().strftime("%m-%d-%y -- %H-%M-%S")
-        archived_log_file = past_logs_folder / f"Autosave {timestamp}.log"
-        shutil.copy2(current_log_file, archived_log_file)
-        log_info(f"Log file archived: {archived_log_file}")
+        log_info(f"Archiving log file to {past_logs_folder}")
+        stop_logging()  # Closes the log and waits for the archiver to compress and index it
     except Exception as e:
-        log_error(f"Failed to archive current log file: {e}")
+        print(f"Failed to archive current log file: {e}")
 
 
 def signal_handler(sig, frame):
     log_info("Termination signal received. Cleaning up and archiving current log file...")
     stop_flag.set()  # Notify all threads to stop
+    save_machine.stop()  # Lets a running save finish and release the lock
+    readiness.stop()
+    log_debounce_stats()
+    log_post_save_metrics()
+    post_save.shutdown()
     archive_current_log()
     sys.exit(0)
 
@@ -78,93 +97,122 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-def is_statusbar_ready():
+def save_workbook():
+    """
+    SAVING step of the autosave state machine (Excel is ready when it runs).
+    Returns the context for release_save, None when there is nothing to save, or RETRY when
+    the workbook or the save lock is not available yet (the state machine tries again later).
+    """
+    if stop_flag.is_set():
+        return None
+
+    log_info("Attempting to attach to an existing Excel instance...")
     try:
-        if Path(STATE_FILE_PATH).exists():
-            with Path(STATE_FILE_PATH).open("r") as file:
-                content = file.read().strip()
-            if content:
-                log_info("Excel is not ready. Statusbar trigger file is not empty.")
-                return False
-        log_info("Excel is ready. Statusbar trigger file is empty.")
-        return True
+        workbook, sheet = get_workbook_and_sheet(retries=1)
     except Exception as e:
-        log_error(f"Error reading statusbar trigger file: {e}")
-        return False
+        log_error(f"Workbook {EXCEL_FILE} not available from the workbook backend: {e}")
+        return RETRY
 
+    backend = get_workbook_backend()
+    if not backend.is_dirty(workbook, sheet):
+        save_stats["skipped"] += 1
+        log_info("Workbook has no unsaved changes. Skipping save.")
+        return None
 
-def wait_until_ready():
-    while not stop_flag.is_set():
-        if is_statusbar_ready():
-            return True
-        log_info("Waiting for Excel to be ready...")
-        time.sleep(0.5)
-    return False
+    try:
+        generation = save_generation.begin()  # Exclusive cross-process lock, then the O_EXCL lock file
+    except TimeoutError as e:
+        log_info(f"{e}. Retrying the save later...")
+        return RETRY
+    log_info(f"Lock file created: {lock_file_path} (generation {generation})")
 
+    saved = False
+    try:
+        log_info(f"Saving workbook: {workbook.name}")
+        workbook.save()
+        saved = True
+        backend.mark_saved(workbook, sheet)
+        save_stats["performed"] += 1
+        log_info("Workbook saved successfully.")
+    except Exception as e:
+        save_stats["failed"] += 1
+        log_error(f"Error saving workbook: {e}")
+    return {"generation": generation, "saved": saved, "workbook_path": EXCEL_FILE}
 
-def perform_save_operation():
-    if stop_flag.is_set():
-        return
 
-    if not wait_until_ready():
-        log_info("Save operation aborted because Excel is not ready.")
-        return
+def release_save(context):
+    """
+    RELEASING step: records the outcome, releases the lock, then starts the post-save hooks.
+    """
+    # Record the outcome first, then release the lock: consumers react immediately
+    save_generation.finish(context["saved"])
+    log_info(f"Lock file removed: {lock_file_path} (generation {context['generation']} {'saved' if context['saved'] else 'failed'})")
+    if context["saved"]:
+        post_save.run({"generation": context["generation"], "workbook_path": context["workbook_path"]})
 
-    try:
-        log_info("Attempting to attach to an existing Excel instance...")
-        app = xw.apps.active
-        workbook = next((wb for wb in app.books if wb.fullname == str(EXCEL_FILE)), None)
 
-        if not workbook:
-            log_error(f"Workbook {EXCEL_FILE} not found in active Excel instance.")
-            return
+def backup_saved_workbook(context):
+    # Shared save lock: a save that starts meanwhile must not hand the backup a half-written file
+    with backup_lock.shared(timeout=READ_LOCK_TIMEOUT):
+        snapshot_id = backup_store.snapshot(context["workbook_path"], label=f"g{context['generation']}")
+    log_info(f"Backup snapshot stored: {snapshot_id}")
 
-        if lock_file_path.exists():
-            log_info("Save operation already in progress. Skipping...")
-            return
 
-        lock_file_path.touch()
-        log_info(f"Lock file created: {lock_file_path}")
+def publish_schedule_snapshot(context):
+    with snapshot_lock.shared(timeout=READ_LOCK_TIMEOUT):
+        snapshot_cache.reload()
+        stamp = source_stamp(context["workbook_path"])  # The file version that was just read
+    snapshot_writer.publish(snapshot_cache.lessons, context["generation"], stamp)
 
-        try:
-            log_info(f"Saving workbook: {workbook.name}")
-            workbook.save()
-            log_info("Workbook saved successfully.")
-        except Exception as e:
-            log_error(f"Error saving workbook: {e}")
-        finally:
-            time.sleep(1)
-            if lock_file_path.exists():
-                lock_file_path.unlink()
-                log_info(f"Lock file removed: {lock_file_path}")
-    except Exception as e:
-        log_error(f"Error during save operation: {e}")
+
+def update_background_colors(context):
+    # read_lesson_data raises instead of showing a dialog and exiting: this runs on a worker thread
+    from background_color.change_background_color import read_lesson_data, apply_background_colors
+
+    apply_background_colors(read_lesson_data())
+
+
+def log_post_save_metrics():
+    for name, stats in post_save.metrics().items():
+        average = stats["total_time"] / stats["runs"] if stats["runs"] else 0.0
+        log_info(
+            f"Post-save hook '{name}': {stats['runs']} runs, avg {average * 1000:.1f} ms, "
+            f"max {stats['max_time'] * 1000:.1f} ms, {stats['failures']} failures, "
+            f"{stats['timeouts']} timeouts, {stats['coalesced']} saves coalesced while busy."
+        )
+
+
+# Follow-up work after every save, run concurrently off the save path
+post_save = PostSavePipeline(max_workers=post_save_workers)
+post_save.register("schedule_snapshot", publish_schedule_snapshot, timeout=10)
+post_save.register("backup", backup_saved_workbook, timeout=30)
+post_save.register("background_colors", update_background_colors, timeout=30)
 
 
 def start_debounce_timer():
-    global debounce_timer
     log_info("Starting or resetting the debounce timer.")
+    save_machine.trigger()
 
-    def debounce_action():
-        global debounce_timer
-        time.sleep(debounce_time)
-        with debounce_lock:
-            if stop_flag.is_set():
-                return
-            if debounce_timer is current_thread() and is_statusbar_ready():
-                log_info("Debounce timer elapsed. Performing save operation.")
-                perform_save_operation()
-                debounce_timer = None
-            else:
-                log_info("Debounce timer elapsed but conditions not met.")
 
-    with debounce_lock:
-        if debounce_timer:
-            log_info("Stopping previous debounce timer.")
-            debounce_timer = None
+def log_debounce_stats():
+    stats = save_machine.stats
+    log_info(
+        f"Autosave stats: {stats['triggers']} triggers received, {stats['saves']} saves released, "
+        f"{stats['skipped']} cycles without a save, {stats['retries']} retries, {stats['failures']} failures "
+        f"({stats['forced']} deadlines forced by max wait, {stats['waited_for_ready']} waited for Excel to be ready)."
+    )
+    log_info(
+        f"Save stats: {save_stats['performed']} performed, {save_stats['skipped']} skipped (no changes), "
+        f"{save_stats['failed']} failed."
+    )
+
 
-        debounce_timer = Thread(target=debounce_action, daemon=True)
-        debounce_timer.start()
+# idle -> pending -> waiting_for_ready -> saving -> releasing, on one worker thread
+save_machine = SaveStateMachine(
+    save_workbook, release_save, readiness.is_ready, debounce_time,
+    max_wait=debounce_max_wait, recheck_interval=readiness.fallback_interval,
+)
+readiness.subscribe(save_machine.notify_ready)  # A waiting save fires as soon as Excel is ready
 
 
 class TriggerFileHandler(FileSystemEventHandler):
@@ -190,6 +238,22 @@ class TriggerFileHandler(FileSystemEventHandler):
             self.was_empty = is_now_empty
 
 
+def on_trigger_event(event):
+    """
+    Trigger events pushed by the VBA over the trigger channel (no file reads).
+    """
+    if event == EDIT:
+        log_info("Edit event received. Starting debounce timer.")
+        start_debounce_timer()
+    else:
+        readiness.set_ready(event == READY)
+
+
+# Message-based triggers from the VBA; the trigger files below remain the fallback
+trigger_channel = TriggerChannel()
+trigger_channel.subscribe(on_trigger_event)
+
+
 def monitor_trigger_file():
     trigger_path = Path(SAVE_TRIGGER_FILE)
     trigger_dir = trigger_path.parent
@@ -200,6 +264,8 @@ def monitor_trigger_file():
 
     try:
         log_info("Starting trigger file monitor...")
+        readiness.start()
+        trigger_channel.start()
         observer.start()
         while not stop_flag.is_set():
             time.sleep(0.1)
@@ -208,6 +274,9 @@ def monitor_trigger_file():
     finally:
         observer.stop()
         observer.join()
+        trigger_channel.stop()
+        save_machine.stop()
+        readiness.stop()
 
 
 if __name__ == "__main__":
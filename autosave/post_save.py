@@ -0,0 +1,130 @@
+import time
+import heapq
+import logging
+from threading import Thread, Condition, Lock
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PostSaveHook:
+    """
+    One registered follow-up task and its timing metrics.
+    """
+    def __init__(self, name, function, timeout):
+        self.name = name
+        self.function = function
+        self.timeout = timeout
+        self.running = False
+        self.token = None  # Identifies the submission currently running
+        self.pending = None  # (context, run id) of the latest save that arrived while running
+        self.stats = {"runs": 0, "failures": 0, "timeouts": 0, "coalesced": 0, "total_time": 0.0, "max_time": 0.0}
+
+
+class PostSavePipeline:
+    """
+    Runs the registered post-save hooks concurrently on a bounded thread pool.
+    run() only submits the hooks and returns, so the save path is never delayed. A single
+    supervisor thread reports hooks that exceed their timeout. Saves that arrive while a hook
+    is still running only mark it dirty: it runs once more with the latest context when the
+    current run finishes, however many saves came in between.
+    """
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="post-save")
+        self.hooks = []
+        self._lock = Lock()
+        self._deadlines = []  # heap of (deadline, token, hook, run id)
+        self._seq = 0
+        self._condition = Condition()
+        self._stopped = False
+        self._supervisor = Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def register(self, name, function, timeout=30.0):
+        """
+        Registers function(context) to run after every successful save.
+        """
+        hook = PostSaveHook(name, function, timeout)
+        self.hooks.append(hook)
+        return hook
+
+    def _run_hook(self, hook, context, run_id):
+        start = time.perf_counter()
+        try:
+            hook.function(context)
+        except Exception as e:
+            with self._lock:
+                hook.stats["failures"] += 1
+            logging.error(f"Post-save hook '{hook.name}' failed: {e}")
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                hook.stats["runs"] += 1
+                hook.stats["total_time"] += elapsed
+                hook.stats["max_time"] = max(hook.stats["max_time"], elapsed)
+                pending, hook.pending = hook.pending, None
+                hook.running = pending is not None and not self._stopped
+            logging.info(f"Post-save hook '{hook.name}' finished in {elapsed * 1000:.1f} ms (run {run_id}).")
+            if hook.running:
+                logging.info(f"Post-save hook '{hook.name}' re-running for run {pending[1]}.")
+                self._submit(hook, *pending)
+
+    def _submit(self, hook, context, run_id):
+        """
+        Starts a run of a hook already marked running, and schedules its timeout check.
+        """
+        with self._lock:
+            self._seq += 1
+            hook.token = self._seq
+        try:
+            self.executor.submit(self._run_hook, hook, context, run_id)
+        except RuntimeError:  # Shut down
+            with self._lock:
+                hook.running = False
+            return
+        with self._condition:
+            heapq.heappush(self._deadlines, (time.monotonic() + hook.timeout, hook.token, hook, run_id))
+            self._condition.notify()
+
+    def run(self, context):
+        """
+        Submits every hook for this save. Returns immediately.
+        """
+        run_id = context.get("generation")
+        for hook in self.hooks:
+            with self._lock:
+                if hook.running:
+                    if hook.pending is not None:
+                        hook.stats["coalesced"] += 1
+                    hook.pending = (context, run_id)
+                    logging.info(f"Post-save hook '{hook.name}' is still running. Run {run_id} will follow it.")
+                    continue
+                hook.running = True
+            self._submit(hook, context, run_id)
+
+    def _supervise(self):
+        with self._condition:
+            while not self._stopped:
+                if not self._deadlines:
+                    self._condition.wait()
+                    continue
+                deadline, token, hook, run_id = self._deadlines[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._deadlines)
+                with self._lock:
+                    overdue = hook.running and hook.token == token
+                    if overdue:
+                        hook.stats["timeouts"] += 1
+                if overdue:
+                    logging.error(f"Post-save hook '{hook.name}' exceeded its {hook.timeout}s timeout (run {run_id}).")
+
+    def metrics(self):
+        with self._lock:
+            return {hook.name: dict(hook.stats) for hook in self.hooks}
+
+    def shutdown(self, wait=False):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
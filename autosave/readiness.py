@@ -0,0 +1,115 @@
+import os
+import logging
+from threading import Lock
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+
+class StateFileHandler(FileSystemEventHandler):
+    """
+    Refreshes the readiness monitor whenever the statusbar state file changes.
+    """
+    def __init__(self, monitor):
+        super().__init__()
+        self.monitor = monitor
+
+    def on_any_event(self, event):
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(path and os.path.abspath(path) == self.monitor.path for path in paths):
+            self.monitor.refresh()
+
+
+class ReadinessMonitor:
+    """
+    Tracks whether Excel is ready, i.e. whether the VBA has emptied the statusbar state file.
+    The last-known state is cached in memory and only re-read when the file's mtime or size
+    changes. A watchdog observer refreshes it the moment the file is written, and subscribers
+    (the save state machine) are called with the new state on every transition, so nothing
+    polls or blocks waiting for Excel.
+    """
+    def __init__(self, path, fallback_interval=5.0):
+        self.path = os.path.abspath(path)
+        self.fallback_interval = fallback_interval  # Safety re-check in case an event is missed
+        self.lock = Lock()
+        self.ready = True
+        self._key = None
+        self._observer = None
+        self.subscribers = []
+        self.stats = {"reads": 0, "cache_hits": 0, "transitions": 0}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-reads the state file if it changed since the last read and notifies subscribers on a transition.
+        """
+        try:
+            stat = os.stat(self.path)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+
+        with self.lock:
+            if key == self._key and self.stats["reads"]:
+                self.stats["cache_hits"] += 1
+                return self.ready
+
+            ready = True
+            if key is not None and key[1] > 0:
+                try:
+                    with open(self.path, "r") as file:
+                        ready = not file.read().strip()
+                except OSError as e:
+                    logging.error(f"Error reading statusbar trigger file: {e}")
+                    ready = False
+            self.stats["reads"] += 1
+            self._key = key
+
+            if ready != self.ready:
+                self.stats["transitions"] += 1
+                logging.info(f"Excel is {'ready' if ready else 'not ready'}. Statusbar trigger file is {'empty' if ready else 'not empty'}.")
+                self._transition(ready)
+            return self.ready
+
+    def set_ready(self, ready):
+        """
+        Records a readiness event pushed by the trigger channel. The state file is only read
+        again once it changes, so a pushed state stays in effect until the VBA falls back to it.
+        """
+        with self.lock:
+            if ready != self.ready:
+                self.stats["transitions"] += 1
+                logging.info(f"Excel is {'ready' if ready else 'not ready'} (trigger channel).")
+                self._transition(ready)
+
+    def subscribe(self, callback):
+        """
+        Registers callback(ready) for readiness transitions. It runs under the monitor's lock,
+        so it must only hand the event off (e.g. put it on a queue).
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def _transition(self, ready):
+        self.ready = ready
+        for callback in list(self.subscribers):
+            try:
+                callback(ready)
+            except Exception as e:
+                logging.error(f"Readiness subscriber failed: {e}")
+
+    def is_ready(self):
+        return self.refresh()
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        self._observer = Observer()
+        self._observer.schedule(StateFileHandler(self), directory, recursive=False)
+        self._observer.start()
+        self.refresh()
+        return self
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
@@ -0,0 +1,168 @@
+import time
+import queue
+import logging
+from threading import Thread
+
+# Autosave states
+IDLE = "idle"
+PENDING = "pending"  # Triggered, debounce deadline running
+WAITING_FOR_READY = "waiting_for_ready"  # Deadline reached while Excel was busy
+SAVING = "saving"
+RELEASING = "releasing"  # Recording the outcome, releasing the lock, starting post-save hooks
+
+# Returned by save() when the save could not run yet (lock or Excel busy): try again later
+RETRY = "retry"
+
+# Events delivered to the worker
+_TRIGGER = "trigger"
+_READY = "ready"
+_STOP = "stop"
+
+
+class SaveStateMachine:
+    """
+    Autosave as an explicit state machine driven by events on a single worker thread:
+    idle -> pending -> (waiting_for_ready) -> saving -> releasing -> idle.
+    trigger() and notify_ready() only enqueue an event, so trigger intake never waits on a save
+    or on Excel. Each trigger pushes the debounce deadline back by `delay` seconds, capped at
+    `max_wait` after the first one. A deadline reached while Excel is busy moves to
+    waiting_for_ready, and the save starts on the next ready event (is_ready() is re-checked
+    every `recheck_interval` seconds in case an event was missed).
+    save() performs the save and returns a context for release(context), None to skip it, or
+    RETRY when it could not run yet: the machine then goes back to pending with a backoff of
+    `retry_delay` seconds, doubled on every consecutive retry up to `max_retry_delay`.
+    Triggers that arrive during a save are queued and start the next cycle.
+    """
+    def __init__(self, save, release, is_ready, delay, max_wait=None, recheck_interval=5.0,
+                 retry_delay=5.0, max_retry_delay=60.0, clock=time.monotonic):
+        self.save = save
+        self.release = release
+        self.is_ready = is_ready
+        self.delay = delay
+        self.max_wait = max_wait
+        self.recheck_interval = recheck_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.retries = 0  # Consecutive RETRY results
+        self.clock = clock
+        self.state = IDLE
+        self.deadline = None  # Debounce deadline while pending
+        self.first_trigger = None  # When the pending burst started
+        self.events = queue.Queue()
+        self.stats = {"triggers": 0, "saves": 0, "skipped": 0, "forced": 0, "waited_for_ready": 0, "failures": 0, "retries": 0}
+        self.worker = Thread(target=self._run, name="autosave", daemon=True)
+        self.worker.start()
+
+    # Event intake (any thread, never blocks)
+
+    def trigger(self):
+        self.events.put((_TRIGGER, None))
+
+    def notify_ready(self, ready):
+        self.events.put((_READY, ready))
+
+    def stop(self):
+        """
+        Stops the worker after the step it is currently running. A pending save is dropped.
+        """
+        self.events.put((_STOP, None))
+        self.worker.join()
+
+    # Worker
+
+    def _set_state(self, state):
+        if state != self.state:
+            logging.info(f"Autosave state: {self.state} -> {state}")
+            self.state = state
+
+    def _due_time(self):
+        if self.max_wait is None:
+            return self.deadline
+        return min(self.deadline, self.first_trigger + self.max_wait)
+
+    def _timeout(self):
+        if self.state == PENDING:
+            return max(0.0, self._due_time() - self.clock())
+        if self.state == WAITING_FOR_READY:
+            return self.recheck_interval
+        return None
+
+    def _run(self):
+        while True:
+            try:
+                kind, value = self.events.get(timeout=self._timeout())
+            except queue.Empty:
+                kind, value = None, None  # Timer expired
+
+            if kind == _STOP:
+                return
+            if kind == _TRIGGER:
+                self._on_trigger()
+            elif kind == _READY and value and self.state == WAITING_FOR_READY:
+                self._save_cycle()
+                continue
+
+            if self.state == PENDING and self.clock() >= self._due_time():
+                self._on_deadline()
+            elif self.state == WAITING_FOR_READY and kind is None and self.is_ready():
+                self._save_cycle()
+
+    def _on_trigger(self):
+        now = self.clock()
+        self.stats["triggers"] += 1
+        if self.state == IDLE:
+            self.first_trigger = now
+            self._set_state(PENDING)
+        if self.state == PENDING:
+            self.deadline = now + self.delay
+        # In waiting_for_ready the save already fires as soon as Excel is ready
+
+    def _on_deadline(self):
+        if self.max_wait is not None and self.clock() >= self.first_trigger + self.max_wait:
+            self.stats["forced"] += 1
+        if self.is_ready():
+            self._save_cycle()
+            return
+        logging.info("Debounce deadline reached but Excel is not ready. Waiting for it.")
+        self.stats["waited_for_ready"] += 1
+        self._set_state(WAITING_FOR_READY)
+
+    def _save_cycle(self):
+        self.deadline = None
+        self.first_trigger = None
+        self._set_state(SAVING)
+        context = None
+        try:
+            context = self.save()
+        except Exception as e:
+            self.stats["failures"] += 1
+            logging.error(f"Autosave failed: {e}")
+
+        if context == RETRY:
+            self._schedule_retry()
+            return
+        self.retries = 0
+        if context is None:
+            self.stats["skipped"] += 1
+        else:
+            self._set_state(RELEASING)
+            try:
+                self.release(context)
+                self.stats["saves"] += 1
+            except Exception as e:
+                self.stats["failures"] += 1
+                logging.error(f"Autosave release failed: {e}")
+        self._set_state(IDLE)
+
+    def _schedule_retry(self):
+        """
+        Re-arms the debounce deadline with exponential backoff after a save that could not run.
+        """
+        backoff = min(self.retry_delay * 2 ** self.retries, self.max_retry_delay)
+        self.retries += 1
+        self.stats["retries"] += 1
+        logging.info(f"Save could not run. Retrying in {backoff:.0f}s (attempt {self.retries}).")
+        now = self.clock()
+        self.first_trigger = now
+        self.deadline = now + backoff
+        self._set_state(PENDING)
@@ -1,10 +1,15 @@
-import os
-import time
 import sys
 import tkinter as tk
 from tkinter import messagebox
-import openpyxl
-from config import SAVE_LOCK_FILE, EXCEL_FILE, EXCEL_COLUMNS
+from config import FILE_READER_BACKEND, READ_LOCK_TIMEOUT, SNAPSHOT_WAIT_TIMEOUT, get_workbook_and_sheet
+from file_lock import FileRWLock
+from lesson import Lesson
+from save_generation import saved_generation
+from schedule_snapshot import ScheduleSnapshot
+from workbook_backends import read_lesson_rows
+
+save_lock = FileRWLock()  # Shared while reading the saved workbook; the autosave holds it exclusively while saving
+snapshot = ScheduleSnapshot()  # Lessons published by the autosave after every save
 
 
 # Function to display an error dialog box
@@ -15,28 +20,31 @@ def show_error_dialog(message):
     root.destroy()
 
 
-# Function to check if autosave is in progress
-def is_autosave_in_progress(lock_file):
-    return os.path.exists(lock_file)
+# Function to read the latest lesson information; raises on errors (used by the autosave hook)
+def read_lesson_data():
+    # The snapshot of the last save needs no workbook access at all
+    found = snapshot.wait_for(saved_generation(), SNAPSHOT_WAIT_TIMEOUT)
+    if found is not None:
+        return found[1]
+
+    # Otherwise read the saved workbook through the file reader backend (streamed, no Excel
+    # needed) under the shared save lock, so a running autosave never hands us a half-written file
+    with save_lock.shared(timeout=READ_LOCK_TIMEOUT):
+        workbook, sheet = get_workbook_and_sheet(backend=FILE_READER_BACKEND)
+        rows = read_lesson_rows(sheet)
+    return [Lesson.from_row(row, values) for row, values in rows.items()]
 
 
-# Function to load the latest lesson information
+# Function to load the latest lesson information, reporting errors in a dialog and exiting
 def load_lesson_data():
     try:
-        wb = openpyxl.load_workbook(EXCEL_FILE)
-        sheet = wb.active
-
-        lesson_data = []
-        for row in sheet.iter_rows(min_row=2, values_only=True):  # Assuming first row is headers
-            data = {
-                "name": row[ord(EXCEL_COLUMNS["name"]) - ord('A')],
-                "day_of_week": row[ord(EXCEL_COLUMNS["day_of_week"]) - ord('A')],
-                "start_time": row[ord(EXCEL_COLUMNS["start_time"]) - ord('A')],
-                "end_time": row[ord(EXCEL_COLUMNS["end_time"]) - ord('A')],
-                "active_status": row[ord(EXCEL_COLUMNS["active_status"]) - ord('A')],
-            }
-            lesson_data.append(data)
-        return lesson_data
+        return read_lesson_data()
+    except TimeoutError:
+        show_error_dialog(
+            f"The autosave has been running for more than {READ_LOCK_TIMEOUT:.0f} seconds.\n"
+            f"Please check the autosave process and try again."
+        )
+        sys.exit(1)
     except Exception as e:
         show_error_dialog(f"Error loading Excel data: {str(e)}")
         sys.exit(1)
@@ -50,26 +58,7 @@ def apply_background_colors(lesson_data):
 
 # Main logic to manage background color updates
 def update_background_colors():
-    retry_count = 0
-    max_retries = 10
-    retry_delay = 2  # Seconds
-
-    while True:
-        if is_autosave_in_progress(SAVE_LOCK_FILE):
-            print(f"Autosave in progress. Retrying in {retry_delay} seconds...")
-            time.sleep(retry_delay)
-            retry_count += 1
-
-            if retry_count >= max_retries:
-                show_error_dialog(
-                    f"The autosave lock file has existed for too long.\n"
-                    f"Please check the autosave process and try again."
-                )
-                sys.exit(1)
-        else:
-            break
-
-    # Load the latest lesson data and apply colors
+    # Load the latest lesson data (waits for a running autosave) and apply colors
     lesson_data = load_lesson_data()
     apply_background_colors(lesson_data)
     print("Background colors updated successfully.")
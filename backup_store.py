@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import zlib
+import hashlib
+import logging
+import zipfile
+from datetime import datetime
+from config import EXCEL_FILE, BACKUP_STORE_DIR
+
+
+class BackupStore:
+    """
+    Incremental, deduplicated backups of the lesson workbook.
+    An .xlsm is a zip archive; every member (sheet1.xml, vbaProject.bin, calcChain.xml, ...) is
+    stored once as a zlib-compressed object named by the SHA-256 of its content, and a snapshot
+    is a small JSON manifest listing the members in order. Unchanged members such as the VBA
+    project are shared by every snapshot, so a new version only costs the members that changed.
+    """
+    def __init__(self, root=BACKUP_STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def _store_object(self, data):
+        """
+        Stores one member's content. Returns (digest, bytes written, 0 if it already existed).
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        compressed = zlib.compress(data, 6)
+        self._write_atomic(path, compressed)
+        return digest, len(compressed)
+
+    def list_snapshots(self):
+        """
+        Snapshot ids, oldest first.
+        """
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+
+    def load_manifest(self, snapshot_id):
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), "r") as file:
+            return json.load(file)
+
+    def snapshot(self, path=EXCEL_FILE, label=None):
+        """
+        Backs up the workbook at `path`. Returns the snapshot id, or the latest snapshot's id when
+        nothing changed since then.
+        """
+        members = []
+        written = 0
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                digest, size = self._store_object(archive.read(info))
+                written += size
+                members.append({
+                    "name": info.filename,
+                    "sha256": digest,
+                    "size": info.file_size,
+                    "date_time": list(info.date_time),
+                    "compress_type": info.compress_type,
+                    "external_attr": info.external_attr,
+                })
+
+        snapshots = self.list_snapshots()
+        if snapshots and self.load_manifest(snapshots[-1])["members"] == members:
+            logging.info(f"Backup unchanged since snapshot {snapshots[-1]}.")
+            return snapshots[-1]
+
+        snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        if label is not None:
+            snapshot_id = f"{snapshot_id}-{label}"
+        manifest = {"source": os.path.abspath(path), "created": datetime.now().isoformat(), "members": members}
+        self._write_atomic(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), json.dumps(manifest, indent=1).encode("utf-8"))
+        logging.info(f"Backup snapshot {snapshot_id} created ({written} new bytes stored).")
+        return snapshot_id
+
+    def restore(self, snapshot_id, destination):
+        """
+        Reassembles the workbook of `snapshot_id` at `destination`.
+        """
+        manifest = self.load_manifest(snapshot_id)
+        temp_path = f"{destination}.{os.getpid()}.tmp"
+        with zipfile.ZipFile(temp_path, "w") as archive:
+            for member in manifest["members"]:
+                with open(self._object_path(member["sha256"]), "rb") as file:
+                    data = zlib.decompress(file.read())
+                info = zipfile.ZipInfo(member["name"], date_time=tuple(member["date_time"]))
+                info.compress_type = member["compress_type"]
+                info.external_attr = member["external_attr"]
+                archive.writestr(info, data)
+        os.replace(temp_path, destination)
+        logging.info(f"Backup snapshot {snapshot_id} restored to {destination}.")
+        return destination
+
+    def stats(self):
+        """
+        Number of snapshots, unique objects and bytes used by the object store.
+        """
+        objects = 0
+        stored = 0
+        for directory, _, files in os.walk(self.objects_dir):
+            for name in files:
+                objects += 1
+                stored += os.path.getsize(os.path.join(directory, name))
+        return {"snapshots": len(self.list_snapshots()), "objects": objects, "stored_bytes": stored}
+
+
+if __name__ == "__main__":
+    # python backup_store.py [list | snapshot | restore <snapshot_id> <destination>]
+    store = BackupStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "snapshot":
+        print(store.snapshot())
+    elif command == "restore":
+        print(store.restore(sys.argv[2], sys.argv[3]))
+    else:
+        for snapshot_id in store.list_snapshots():
+            print(snapshot_id)
+        print(store.stats())
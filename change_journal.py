@@ -0,0 +1,184 @@
+import os
+import json
+import logging
+from collections import namedtuple
+from config import CHANGE_JOURNAL_FILE, EXCEL_SHEET, EXCEL_DATA_RANGE, TEMP_DIR
+from save_generation import write_atomic
+from workbook_backends import parse_address
+
+# One line of the journal, appended by the VBA Worksheet_Change handler:
+#   <sequence> TAB <sheet> TAB <Target.Address> TAB <old fingerprint> TAB <new fingerprint>
+ChangeRecord = namedtuple("ChangeRecord", ["sequence", "sheet", "address", "old", "new"])
+JournalBatch = namedtuple("JournalBatch", ["records", "gap", "reason"])
+
+
+def format_record(record):
+    return "\t".join(str(field) for field in record) + "\n"
+
+
+def parse_record(line):
+    """
+    Parses one journal line. Returns a ChangeRecord, or None for blank, comment or malformed lines.
+    """
+    if not line.strip() or line.startswith("#"):
+        return None
+    fields = line.rstrip("\r\n").split("\t")
+    if len(fields) != 5:
+        return None
+    try:
+        sequence = int(fields[0])
+    except ValueError:
+        return None
+    return ChangeRecord(sequence, *fields[1:])
+
+
+def address_rows(address):
+    """
+    Rows covered by a Target.Address such as '$G$5' or '$A$5:$C$7,$E$9'.
+    Returns None when an area spans whole columns ('$A:$A') or whole rows ('$5:$7'): a whole-row
+    Target is what row inserts and deletes report, and they shift every row below them.
+    """
+    rows = set()
+    for area in address.replace("$", "").split(","):
+        parts = area.split(":")
+        if all(part.isdigit() for part in parts) or all(part.isalpha() for part in parts):
+            return None
+        first, _, last, _ = parse_address(area)
+        rows.update(range(min(first, last), max(first, last) + 1))
+    return rows
+
+
+def affected_rows(records, sheet_name=EXCEL_SHEET, data_range=EXCEL_DATA_RANGE):
+    """
+    Data rows touched by the records of `sheet_name`. Edits whose fingerprint did not change are
+    ignored. Returns None if a record covers whole rows or columns.
+    """
+    first_row, _, last_row, _ = parse_address(data_range)
+    rows = set()
+    for record in records:
+        if record.sheet != sheet_name or record.old == record.new:
+            continue
+        record_rows = address_rows(record.address)
+        if record_rows is None:
+            return None
+        rows.update(row for row in record_rows if first_row <= row <= last_row)
+    return rows
+
+
+class ChangeJournalReader:
+    """
+    Tailing reader for the append-only change journal.
+    read() returns the complete records appended since the last commit(); a partially written
+    last line is left for the next call. The offset, last sequence number and file identity
+    are checkpointed per consumer, so every consumer sees every record once. A missing journal,
+    a truncated or replaced file, or a jump in the sequence numbers is reported as a gap: the
+    caller must then fall back to a full reload.
+    """
+    def __init__(self, path=CHANGE_JOURNAL_FILE, consumer="default", checkpoint_path=None):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or os.path.join(TEMP_DIR, f"changes.{consumer}.checkpoint")
+        self.offset = 0
+        self.sequence = None
+        self.file_id = None
+        self._pending = None
+        self.stats = {"reads": 0, "records": 0, "gaps": 0}
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r") as file:
+                checkpoint = json.load(file)
+            self.offset = checkpoint["offset"]
+            self.sequence = checkpoint["sequence"]
+            self.file_id = tuple(checkpoint["file_id"]) if checkpoint["file_id"] else None
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _file_id(self, stat):
+        return (stat.st_dev, stat.st_ino)
+
+    def _scan(self, validate=True):
+        """
+        Reads the complete lines after the checkpoint. Returns (records, gap reason or None)
+        and stages the new position for commit().
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._pending = None
+            return [], "journal missing"
+
+        offset, sequence, reason = self.offset, self.sequence, None
+        file_id = self._file_id(stat)
+        if self.file_id is not None and (file_id != self.file_id or stat.st_size < offset):
+            offset, sequence, reason = 0, None, "journal replaced or truncated"
+
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+        complete = data[:data.rfind(b"\n") + 1]
+
+        records = []
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            record = parse_record(line)
+            if record is None:
+                continue
+            if validate and reason is None and sequence is not None and record.sequence != sequence + 1:
+                reason = f"sequence jumped from {sequence} to {record.sequence}"
+            sequence = record.sequence
+            records.append(record)
+
+        self._pending = (offset + len(complete), sequence, file_id)
+        return records, reason
+
+    def read(self):
+        """
+        Returns a JournalBatch of the records appended since the last commit.
+        """
+        records, reason = self._scan()
+        self.stats["reads"] += 1
+        self.stats["records"] += len(records)
+        if reason is not None:
+            self.stats["gaps"] += 1
+        return JournalBatch(records, reason is not None, reason)
+
+    def seek_end(self):
+        """
+        Skips everything written so far (used before a full reload, which covers it anyway).
+        """
+        self._scan(validate=False)
+
+    def commit(self):
+        """
+        Persists the position reached by the last read()/seek_end().
+        """
+        if self._pending is None:
+            return
+        self.offset, self.sequence, self.file_id = self._pending
+        self._pending = None
+        write_atomic(self.checkpoint_path, {"offset": self.offset, "sequence": self.sequence, "file_id": self.file_id})
+
+
+class ChangeJournalWriter:
+    """
+    Appends records the way the VBA does. Used by the replay tool and for testing.
+    """
+    def __init__(self, path=CHANGE_JOURNAL_FILE):
+        self.path = path
+        self.sequence = 0
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    record = parse_record(line)
+                    if record is not None:
+                        self.sequence = record.sequence
+        except FileNotFoundError:
+            pass
+
+    def append(self, address, old, new, sheet=EXCEL_SHEET):
+        self.sequence += 1
+        record = ChangeRecord(self.sequence, sheet, address, old, new)
+        with open(self.path, "a", encoding="utf-8", newline="\n") as file:
+            file.write(format_record(record))
+        logging.debug("Journal record appended: %s", record)
+        return record
@@ -1,4 +1,5 @@
 import os
+import logging
 # Define the root directory of the project
 
 #region settings
@@ -11,15 +12,46 @@ SLEEP_INTERVAL = 10
 # Define shared paths
 EXCEL_FILE = os.path.join(ROOT_DIR, "Guitar-lessons.xlsm")  # Path to the main Excel file
 EXCEL_SHEET = "Lesson Schedule"  # Default sheet name in the workbook
+EXCEL_DATA_RANGE = "A2:Z501"  # Data rows of the sheet (dimension A1:Z501 minus the header row)
+EXCEL_USED_RANGE = "A1:Z501"  # Whole used range, fingerprinted to detect unsaved changes
 TRIGGERS_DIR = os.path.join(ROOT_DIR, "triggers")
 TEMP_DIR = os.path.join(ROOT_DIR, "temp")  # Temp directory for lock files
 SAVE_LOCK_FILE = os.path.join(TEMP_DIR, "autosave.lock")  # Lock file for autosave
+SAVE_STATE_FILE = os.path.join(TEMP_DIR, "autosave.state")  # Generation and outcome of the last save
+SAVE_RWLOCK_FILE = os.path.join(TEMP_DIR, "autosave.rwlock")  # Byte-range locked: exclusive while saving, shared while reading the saved file
+SAVE_LOCK_TIMEOUT = 10.0  # Seconds the saver waits for readers before skipping a save
+READ_LOCK_TIMEOUT = 20.0  # Seconds a reader waits for a running save before giving up
+LOCK_POLL_MIN_INTERVAL = 0.05  # Fastest lock file polling interval when watchdog is unavailable (seconds)
+LOCK_POLL_MAX_INTERVAL = 2.0  # Polling interval reached after the lock file has been idle for a while
+
+# Lesson daemon IPC endpoint: a named pipe on Windows, a Unix socket elsewhere
+if os.name == "nt":
+    LESSON_DAEMON_ADDRESS = r"\\.\pipe\guitar-lesson-daemon"
+else:
+    LESSON_DAEMON_ADDRESS = os.path.join(TEMP_DIR, "lesson-daemon.sock")
+LESSON_DAEMON_AUTHKEY_FILE = os.path.join(TEMP_DIR, "lesson-daemon.key")  # Random per-install secret (user-only permissions)
+LESSON_DAEMON_QUERY_TIMEOUT = 10.0  # Seconds a client waits for the daemon to catch up with the last save
+
+# Trigger events from the workbook's VBA (edit / ready / busy), see trigger_channel
+if os.name == "nt":
+    TRIGGER_CHANNEL_ADDRESS = r"\\.\pipe\guitar-lesson-triggers"
+else:
+    TRIGGER_CHANNEL_ADDRESS = os.path.join(TEMP_DIR, "triggers.sock")
+TRIGGER_SEQUENCE_RESET_GAP = 100  # A sequence this far below the last one starts a new writer session (workbook reopened)
+TRIGGER_SEQUENCE_RESET_IDLE = 5.0  # Seconds after which any lower sequence starts a new writer session
+
+CHANGE_JOURNAL_FILE = os.path.join(TEMP_DIR, "changes.journal")  # Cell changes appended by Worksheet_Change
+SCHEDULE_SNAPSHOT_FILE = os.path.join(TEMP_DIR, "schedule.snapshot")  # Binary lesson snapshot written after every save
+SNAPSHOT_MAX_LESSONS = 500  # Record slots in the snapshot (one per row of EXCEL_DATA_RANGE)
+SNAPSHOT_STRINGS_SIZE = 64 * 1024  # Bytes reserved for the snapshot's string table (student names)
+SNAPSHOT_WAIT_TIMEOUT = 5.0  # Seconds a reader waits for the snapshot of a finished save before reading the workbook
+BACKUP_STORE_DIR = os.path.join(ROOT_DIR, "backups", "store")  # Deduplicated workbook backups
 
 # Autosave-specific paths
 AUTOSAVE_DIR = os.path.join(ROOT_DIR, "autosave")  # Autosave directory
 SAVE_TRIGGER_FILE = os.path.join(TRIGGERS_DIR, "autosave_trigger.txt")  # Trigger file for autosave
 AUTOSAVE_VENV_DIR = os.path.join(AUTOSAVE_DIR, ".venv")  # Virtual environment for autosave
-STATE_FILE_PATH = "triggers/statusbar-state.txt"
+STATE_FILE_PATH = os.path.join(TRIGGERS_DIR, "statusbar-state.txt")  # Statusbar state file (empty when Excel is ready)
 # Background color-specific paths
 BACKGROUND_COLOR_DIR = os.path.join(ROOT_DIR, "background_color")  # Directory for background color program
 BACKGROUND_COLOR_VENV_DIR = os.path.join(BACKGROUND_COLOR_DIR, ".venv-bg-color")  # Virtual environment for background color
@@ -30,7 +62,9 @@ EXCEL_COLUMNS = {
     "day_of_week": "C",       # Column for days of the week
     "start_time": "G",        # Column for lesson start times
     "end_time": "H",          # Column for lesson end times
-    "active_status": "Q",     # Column for active/inactive status (Yes/No)
+    "rate": "M",              # Column for the applicable rate
+    "duration": "Q",          # Column for lesson durations [hh:mm]
+    "people": "R",            # Column for the number of people
 }
 
 # Ensure required directories exist
@@ -38,60 +72,74 @@ os.makedirs(TEMP_DIR, exist_ok=True)  # Create temp directory if it doesn't exis
 os.makedirs(AUTOSAVE_DIR, exist_ok=True)  # Ensure autosave directory exists
 os.makedirs(BACKGROUND_COLOR_DIR, exist_ok=True)  # Ensure background color directory exists
 
+# Workbook backend selection
+# "xlwings"  - live Excel instance over COM (Windows only)
+# "openpyxl" - saved workbook read with openpyxl in read-only mode
+# "zip"      - saved workbook streamed straight from the .xlsm archive
+# "fake"     - in-memory sheet for tests and benchmarks
+WORKBOOK_BACKEND = "xlwings"  # Backend used for the live lesson data
+FILE_READER_BACKEND = "zip"  # Backend used by programs that only need the saved file
+FAKE_RANGE_LATENCY = 0.0  # Simulated seconds per sheet.range(...).value call on the fake backend
+
+# Log files written through queue_logging (rotation and write batching)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotate the current log once it reaches this size (0 = never)
+LOG_BACKUP_COUNT = 3  # Rotated files kept next to the current log
+LOG_ROTATE_WHEN = None  # Time-based rotation instead ("midnight", "h", ...), None for size-based
+LOG_BATCH_SIZE = 50  # Records written between flushes while the log queue is busy
+
+# Archived logs (log_archiver): finished and rolled logs are compressed into logs/past-logs/<Program>
+LOG_ARCHIVE_MAX_FILES = 100  # Archives kept per program (0 = unlimited)
+LOG_ARCHIVE_MAX_BYTES = 100 * 1024 * 1024  # Compressed bytes kept per program (0 = unlimited)
+LOG_ARCHIVE_MAX_AGE_DAYS = None  # Delete archives older than this many days (None = keep)
+LOG_ARCHIVE_COMPRESSION = "gzip"  # "gzip", or "zstd" when the zstandard package is installed
+
+# Per-module log levels for the lesson pipeline (see get_logger)
+# Raise a module to logging.WARNING to drop its per-call INFO lines without touching the code
+LOG_LEVELS = {
+    "NextLesson": logging.INFO,
+    "lesson_cache": logging.INFO,
+    "lesson_source": logging.INFO,
+    "weekly_schedule": logging.WARNING,
+}
+
+def get_logger(name):
+    """
+    Returns the named logger with its level from LOG_LEVELS (unlisted modules inherit the root level).
+    """
+    logger = logging.getLogger(name)
+    if name in LOG_LEVELS:
+        logger.setLevel(LOG_LEVELS[name])
+    return logger
+
 # Workbook and Sheet Lazy Initialization
 workbook = None
 sheet = None
 
-def get_workbook_and_sheet(retries=3, delay=2):
+def get_workbook_and_sheet(retries=3, delay=2, backend=None):
+    """
+    Returns the workbook and sheet from the configured backend.
+    The handle is cached and only re-attached (with backoff) when its liveness probe fails.
+    """
+    global workbook, sheet
+    from workbook_backends import get_connection
+
+    workbook, sheet = get_connection(backend or WORKBOOK_BACKEND).get(retries=retries, delay=delay)
+    return workbook, sheet
+
+
+def get_workbook_backend(backend=None):
     """
-    Initializes and returns the workbook and sheet, with retry logic and detailed state logging.
+    Returns the backend instance behind get_workbook_and_sheet.
     """
-    import xlwings as xw
-    import time
-
-    for attempt in range(1, retries + 1):
-        try:
-            print(f"Initializing workbook and sheet (Attempt {attempt}/{retries})...")
-
-            # Start or attach to Excel
-            if not xw.apps:
-                app = xw.App(visible=True)
-                print("Started a new Excel instance.")
-            else:
-                app = xw.apps.active
-                print(f"Attached to active Excel instance. Open workbooks: {len(app.books)}")
-
-            # Check if workbook exists
-            if not os.path.exists(EXCEL_FILE):
-                raise FileNotFoundError(f"Workbook not found at path: {EXCEL_FILE}")
-
-            # Open workbook or use an existing instance
-            workbook = next((wb for wb in app.books if wb.fullname == EXCEL_FILE), None)
-            if workbook is None:
-                print("Workbook not open. Opening now...")
-                workbook = app.books.open(EXCEL_FILE)
-            else:
-                print(f"Workbook is already open: {workbook.fullname}")
-
-            # List available sheets
-            sheet_names = [sheet.name for sheet in workbook.sheets]
-            print(f"Available sheets: {sheet_names}")
-
-            # Access the target sheet
-            if EXCEL_SHEET not in sheet_names:
-                raise ValueError(f"Sheet '{EXCEL_SHEET}' not found in workbook.")
-            sheet = workbook.sheets[EXCEL_SHEET]
-
-            print(f"Successfully accessed sheet: {sheet.name}")
-            return workbook, sheet
-
-        except Exception as e:
-            print(f"Error during initialization: {e}")
-            if attempt < retries:
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            else:
-                print("Max retries reached. Aborting.")
-                raise
+    from workbook_backends import get_connection
+
+    return get_connection(backend or WORKBOOK_BACKEND).backend
 
 
+def get_connection_stats(backend=None):
+    """
+    Returns the hit/miss/reattach counters of the cached workbook connection.
+    """
+    from workbook_backends import get_connection
+
+    return dict(get_connection(backend or WORKBOOK_BACKEND).stats)
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import logging
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+import config
+import NextLesson
+from lesson import Lesson
+from workbook_backends import FakeBackend, set_backend
+
+LESSON_ROWS = 500  # Number of filled rows in the fake "Lesson Schedule"
+RANGE_LATENCY = 0.0005  # Simulated cost of one cross-process COM call (seconds)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_cells(rows):
+    cells = {}
+    for row in range(2, rows + 2):
+        cells[f"A{row}"] = f"Student {row}"
+        cells[f"C{row}"] = WEEKDAYS[row % 7]
+        cells[f"G{row}"] = (row % 48) / 48
+    return cells
+
+
+def fetch_per_row():
+    """
+    The original reader: three cells (name, weekday, start time) per row, one COM call each,
+    until the first blank name.
+    """
+    workbook, sheet = config.get_workbook_and_sheet()
+    lessons = []
+    row = 2  # Start from row 2 (headers are in row 1)
+    while True:
+        name = sheet.range(f"A{row}").value
+        weekday = sheet.range(f"C{row}").value
+        start_time = sheet.range(f"G{row}").value
+        if not name or str(name).strip() == "":
+            return lessons
+        lessons.append(Lesson.from_values(row, name, weekday, start_time))
+        row += 1
+
+
+def run(fetch):
+    backend = set_backend("fake", FakeBackend(make_cells(LESSON_ROWS), latency=RANGE_LATENCY))
+    start = time.perf_counter()
+    lessons = fetch()
+    elapsed = time.perf_counter() - start
+    return lessons, backend.sheet.range_calls, elapsed
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)  # Module loggers set their own levels (config.LOG_LEVELS)
+    config.WORKBOOK_BACKEND = "fake"
+
+    per_row_lessons, per_row_calls, per_row_time = run(fetch_per_row)
+    bulk_lessons, bulk_calls, bulk_time = run(NextLesson.fetch_data)
+
+    assert per_row_lessons == bulk_lessons, "Bulk read returned different lessons"
+    print(f"Lessons fetched: {len(bulk_lessons)} (simulated COM latency {RANGE_LATENCY * 1000:.2f} ms/call)")
+    print(f"Per-row: {per_row_calls:5d} range calls, {per_row_time * 1000:8.2f} ms")
+    print(f"Bulk:    {bulk_calls:5d} range calls, {bulk_time * 1000:8.2f} ms")
+    print(f"Speedup: {per_row_time / bulk_time:.1f}x")
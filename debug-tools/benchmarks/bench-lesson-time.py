@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import random
+import logging
+from datetime import datetime, timedelta
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+from lesson import Lesson
+from weekly_schedule import WeeklySchedule, WEEKDAY_MAP, MINUTES_PER_DAY, MINUTES_PER_WEEK, minute_of_week, week_start
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCHEDULE_SIZES = [500, 10000, 100000]
+QUERIES = 20  # next-lesson lookups per schedule
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", " saturday", "Sunday"]
+
+
+def make_columns(rows):
+    rng = random.Random(rows)
+    names = [f"Student {row}" for row in range(2, rows + 2)]
+    weekdays = [rng.choice(WEEKDAYS) for _ in range(rows)]
+    starts = [rng.randrange(8 * 4, 22 * 4) / 96 for _ in range(rows)]  # Quarter-hour slots 08:00-22:00
+    return names, weekdays, starts
+
+
+def per_lesson(names, weekdays, starts, moments):
+    """
+    Current path: one Lesson per row, then a WeeklySchedule built from the records.
+    """
+    start = time.perf_counter()
+    lessons = [
+        Lesson.from_values(row, name, weekday, serial)
+        for row, (name, weekday, serial) in enumerate(zip(names, weekdays, starts), start=2)
+    ]
+    schedule = WeeklySchedule(lessons)
+    convert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [schedule.next_lesson(moment) for moment in moments]
+    query_time = time.perf_counter() - start
+    return [(lesson.row, when) for lesson, when in results], convert_time, query_time
+
+
+def minutes_of_week(weekdays, start_serials):
+    """
+    Start minute since Monday 00:00 of every row as one NumPy array (-1 for an invalid weekday
+    or start), truncated to the minute like WeeklySchedule.
+    """
+    names = np.char.lower(np.char.strip(np.array(weekdays, dtype=str)))
+    unique, inverse = np.unique(names, return_inverse=True)
+    days = np.array([WEEKDAY_MAP.get(name, -1) for name in unique.tolist()], dtype=np.int64)[inverse.reshape(-1)]
+    values = np.array(start_serials, dtype=np.float64)
+    seconds = np.round(np.mod(values, 1.0) * 86400)
+    minutes = days * MINUTES_PER_DAY + np.floor_divide(seconds, 60).astype(np.int64)
+    minutes[days == -1] = -1
+    return minutes
+
+
+def next_lesson_index(minutes, now):
+    """
+    (index, lesson_datetime) of the first lesson starting after `now`; equal start minutes
+    resolve to the earliest row, like WeeklySchedule.next_lesson.
+    """
+    current = minute_of_week(now)
+    ahead = minutes - current
+    ahead = np.where(ahead > 0, ahead, ahead + MINUTES_PER_WEEK)  # Wrap around to next week
+    ahead = np.where(minutes >= 0, ahead, np.inf)
+    index = int(np.argmin(ahead))
+    weeks_ahead = 1 if minutes[index] <= current else 0
+    return index, week_start(now) + timedelta(weeks=weeks_ahead, minutes=int(minutes[index]))
+
+
+def vectorized(names, weekdays, starts, moments):
+    """
+    NumPy alternative: the weekday and start columns converted in one pass, one argmin per query.
+    """
+    start = time.perf_counter()
+    minutes = minutes_of_week(weekdays, starts)
+    convert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [next_lesson_index(minutes, moment) for moment in moments]
+    query_time = time.perf_counter() - start
+    return [(index + 2, when) for index, when in results], convert_time, query_time
+
+
+if __name__ == "__main__":
+    # Kept as the record for staying with WeeklySchedule: NumPy only wins on building the
+    # index from 10k+ rows, and every lookup is slower than WeeklySchedule's bisect
+    if np is None:
+        sys.exit("bench-lesson-time needs numpy (pip install numpy)")
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+    moments = [datetime(2024, 1, 1 + rng.randrange(7), rng.randrange(24), rng.randrange(60)) for _ in range(QUERIES)]
+
+    print(f"{'rows':>7} | {'WeeklySchedule build':>18} {'query':>9} | {'NumPy build':>18} {'query':>9} | build speedup")
+    for rows in SCHEDULE_SIZES:
+        columns = make_columns(rows)
+        expected, slow_convert, slow_query = per_lesson(*columns, moments)
+        actual, fast_convert, fast_query = vectorized(*columns, moments)
+        assert expected == actual, "NumPy next lesson differs from WeeklySchedule"
+        print(f"{rows:7d} | {slow_convert * 1000:15.2f} ms {slow_query * 1000 / QUERIES:6.3f} ms"
+              f" | {fast_convert * 1000:15.2f} ms {fast_query * 1000 / QUERIES:6.3f} ms"
+              f" | {slow_convert / fast_convert:.1f}x")
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import random
+import logging
+from datetime import datetime
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+from lesson import Lesson
+from weekly_schedule import WeeklySchedule
+
+CALLS = 20000  # find_next_lesson calls per level
+LESSON_ROWS = 500
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_schedule(rows):
+    rng = random.Random(rows)
+    lessons = [
+        Lesson.from_values(row, f"Student {row}", rng.choice(WEEKDAYS), rng.randrange(32, 88) / 96, duration=1 / 48)
+        for row in range(2, rows + 2)
+    ]
+    return lessons, WeeklySchedule(lessons)
+
+
+logger = logging.getLogger("NextLesson")
+
+
+def lazy_find_next_lesson(lessons, schedule):
+    """
+    The lookup with the repo's logging style: %-style arguments, formatted only when emitted.
+    """
+    now = datetime.now()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Current time: %s", now)
+        logger.info("Today's weekday number (now.weekday()): %d", now.weekday())
+    found = schedule.next_lesson(now)
+    if found:
+        lesson, lesson_datetime = found
+        logger.info("Lesson '%s' datetime calculated as %s", lesson.name, lesson_datetime)
+        return lesson, lesson_datetime
+    return None
+
+
+def eager_find_next_lesson(lessons, schedule):
+    """
+    The same lookup as it was before: every message is formatted with an f-string up front.
+    """
+    now = datetime.now()
+    logging.info(f"Current time: {now}")
+    logging.info(f"Today's weekday number (now.weekday()): {now.weekday()}")
+    found = schedule.next_lesson(now)
+    if found:
+        lesson, lesson_datetime = found
+        logging.info(f"Lesson '{lesson.name}' datetime calculated as {lesson_datetime}")
+        return lesson, lesson_datetime
+    return None
+
+
+def time_calls(function, lessons, schedule, level):
+    logger.setLevel(level)
+    logging.getLogger().setLevel(level)
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        function(lessons, schedule)
+    return (time.perf_counter() - start) / CALLS
+
+
+if __name__ == "__main__":
+    # Discard the output so the numbers measure formatting and dispatch, not the terminal
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    devnull = open(os.devnull, "w")
+    root.addHandler(logging.StreamHandler(devnull))
+
+    lessons, schedule = make_schedule(LESSON_ROWS)
+    print(f"find_next_lesson, {LESSON_ROWS} lessons, {CALLS} calls per row")
+    for label, function in (("lazy (current)", lazy_find_next_lesson), ("eager f-strings", eager_find_next_lesson)):
+        info = time_calls(function, lessons, schedule, logging.INFO)
+        warning = time_calls(function, lessons, schedule, logging.WARNING)
+        print(f"{label:<16} INFO: {info * 1e6:7.2f} us/call   WARNING: {warning * 1e6:7.2f} us/call"
+              f"   ({info / warning:.1f}x)")
+    devnull.close()
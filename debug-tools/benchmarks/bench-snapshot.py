@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import logging
+import tempfile
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+from lesson_cache import LessonCache
+from schedule_snapshot import ScheduleSnapshot, ScheduleSnapshotWriter, source_stamp
+from workbook_backends import FakeBackend, set_backend, read_lesson_rows
+
+LESSON_ROWS = 500  # Filled rows in the fake "Lesson Schedule" (the snapshot's full capacity)
+RELOADS = 200  # Reloads timed per variant
+RANGE_LATENCY = 0.0005  # Simulated cost of one cross-process COM call (seconds)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_cells(rows):
+    cells = {}
+    for row in range(2, rows + 2):
+        cells[f"A{row}"] = f"Student {row}"
+        cells[f"C{row}"] = WEEKDAYS[row % 7]
+        cells[f"G{row}"] = (row % 48) / 48
+        cells[f"Q{row}"] = 1 / 48
+    return cells
+
+
+def timed(function, repeat=RELOADS):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    backend = set_backend("fake", FakeBackend(make_cells(LESSON_ROWS), latency=RANGE_LATENCY))
+    workbook = LessonCache(backend="fake")
+    lessons = workbook.load()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schedule.snapshot")
+        source = os.path.join(directory, "lessons.xlsm")  # Stands in for the saved workbook file
+        with open(source, "wb") as file:
+            file.write(b"saved")
+        writer = ScheduleSnapshotWriter(path)
+        writer.publish(lessons, 1, source_stamp(source))
+        reader = ScheduleSnapshot(path, source=source)
+        assert reader.read()[1] == lessons, "Snapshot differs from the workbook"
+
+        generation = [1]
+
+        def publish_and_read():
+            generation[0] += 1
+            writer.publish(lessons, generation[0], source_stamp(source))
+            return reader.read()
+
+        results = {
+            "workbook full read": timed(lambda: read_lesson_rows(backend.sheet), repeat=20),
+            "snapshot publish": timed(lambda: writer.publish(lessons, generation[0], source_stamp(source))),
+            "snapshot publish + read": timed(publish_and_read),
+            "snapshot read (unchanged)": timed(reader.read),
+        }
+
+        # A workbook saved after the snapshot was published makes it stale
+        with open(source, "ab") as file:
+            file.write(b" again")
+        assert reader.read() is None, "Stale snapshot was not ignored"
+        writer.close()
+        reader.close()
+
+    print(f"{LESSON_ROWS} lessons, snapshot file {writer.size} bytes (simulated COM latency {RANGE_LATENCY * 1000:.2f} ms/call)")
+    for label, elapsed in results.items():
+        print(f"{label:<27} {elapsed:8.3f} ms")
+    print(f"Reader stats: {reader.stats}")
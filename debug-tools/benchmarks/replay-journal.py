@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+from lesson_cache import LessonCache
+from change_journal import ChangeJournalReader, ChangeJournalWriter, ChangeRecord, format_record
+from workbook_backends import FakeBackend, set_backend
+from config import EXCEL_SHEET
+
+LESSON_ROWS = 500  # Filled rows in the fake "Lesson Schedule"
+SAVES = 20  # Simulated save cycles
+EDITS_PER_SAVE = 3  # Cell edits journaled between two saves
+RANGE_LATENCY = 0.0005  # Simulated cost of one cross-process COM call (seconds)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_cells(rows):
+    cells = {}
+    for row in range(2, rows + 2):
+        cells[f"A{row}"] = f"Student {row}"
+        cells[f"C{row}"] = WEEKDAYS[row % 7]
+        cells[f"G{row}"] = (row % 48) / 48
+        cells[f"Q{row}"] = 1 / 48
+    return cells
+
+
+def edit(sheet, writer, rng, rows):
+    """
+    Changes one start time cell and journals it, like the VBA Worksheet_Change handler.
+    """
+    row = rng.randrange(2, rows + 2)
+    address = f"G{row}"
+    old = sheet.cells.get(address)
+    new = rng.randrange(32, 88) / 96
+    sheet.set_value(address, new)
+    writer.append(f"${address[0]}${row}", repr(old), repr(new))
+
+
+def shift_rows(sheet, writer, row, rows, delete):
+    """
+    Deletes or inserts sheet row `row` and journals the whole-row Target, like Excel does.
+    Every lesson row below it moves up or down by one.
+    """
+    columns = sorted({address.rstrip("0123456789") for address in sheet.cells})
+    last = rows + 1
+    if delete:
+        moves = [(target, target + 1) for target in range(row, last + 1)]
+    else:
+        moves = [(target, target - 1) for target in range(last + 1, row, -1)]
+    for target, source in moves:
+        for column in columns:
+            sheet.set_value(f"{column}{target}", sheet.cells.get(f"{column}{source}"))
+    if not delete:
+        for column in columns:
+            sheet.set_value(f"{column}{row}", None)
+        sheet.set_value(f"A{row}", "Inserted student")
+        sheet.set_value(f"C{row}", "Monday")
+    writer.append(f"${row}:${row}", "deleted" if delete else "", "" if delete else "inserted")
+
+
+def timed_reload(cache, sheet):
+    calls = sheet.range_calls
+    start = time.perf_counter()
+    delta = cache.reload()
+    return delta, sheet.range_calls - calls, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+    backend = set_backend("fake", FakeBackend(make_cells(LESSON_ROWS), latency=RANGE_LATENCY))
+    sheet = backend.sheet
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal_path = os.path.join(directory, "changes.journal")
+        writer = ChangeJournalWriter(journal_path)
+        reader = ChangeJournalReader(journal_path, checkpoint_path=os.path.join(directory, "replay.checkpoint"))
+        journaled = LessonCache(backend="fake", journal=reader)
+        full = LessonCache(backend="fake")
+        writer.append("$A$1", "", "")  # Create the journal before the first load
+        journaled.load()
+        full.load()
+
+        totals = {"journal": [0, 0.0], "full": [0, 0.0]}
+        for _ in range(SAVES):
+            for _ in range(EDITS_PER_SAVE):
+                edit(sheet, writer, rng, LESSON_ROWS)
+            journal_delta, calls, elapsed = timed_reload(journaled, sheet)
+            totals["journal"][0] += calls
+            totals["journal"][1] += elapsed
+            full_delta, calls, elapsed = timed_reload(full, sheet)
+            totals["full"][0] += calls
+            totals["full"][1] += elapsed
+            assert journaled.lessons == full.lessons, "Journal reload diverged from the full reload"
+            assert set(journal_delta.changed) == set(full_delta.changed)
+
+        # A lost record must force a full reload
+        with open(journal_path, "a", encoding="utf-8") as file:
+            file.write(format_record(ChangeRecord(writer.sequence + 5, EXCEL_SHEET, "$G$2", "0", "1")))
+        edit(sheet, writer, rng, LESSON_ROWS)
+        journaled.reload()
+        full.reload()
+        assert journaled.lessons == full.lessons
+
+        # Deleting or inserting a row shifts the rows below it and must force a full reload
+        for delete in (True, False):
+            shift_rows(sheet, writer, LESSON_ROWS // 2, LESSON_ROWS, delete)
+            fallbacks = journaled.stats["journal_fallbacks"]
+            journaled.reload()
+            full.reload()
+            assert journaled.stats["journal_fallbacks"] == fallbacks + 1, "Row shift was not reloaded in full"
+            assert journaled.lessons == full.lessons, "Journal reload diverged after a row shift"
+
+    print(f"{SAVES} saves x {EDITS_PER_SAVE} edits on {LESSON_ROWS} rows (simulated COM latency {RANGE_LATENCY * 1000:.2f} ms/call)")
+    for label, (calls, elapsed) in totals.items():
+        print(f"{label:<8} reload: {calls / SAVES:6.1f} range calls, {elapsed * 1000 / SAVES:7.2f} ms per save")
+    print(f"Journal cache stats: {journaled.stats}")
+    print(f"Journal reader stats: {reader.stats}")
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import logging
+from datetime import datetime, timedelta
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, parent_dir)
+import config
+from CurrentLesson import CurrentLesson
+from lesson_cache import LessonCache
+from lesson_scheduler import SimulatedClock
+from weekly_schedule import week_start
+from workbook_backends import get_backend
+
+
+def simulate_week():
+    """
+    Replays one week of CurrentLesson against the fake backend with a simulated clock.
+    A one-cell edit plus save is injected during the first lesson to exercise the reinit path.
+    """
+    config.WORKBOOK_BACKEND = "fake"
+    sheet = get_backend("fake").sheet
+    start = week_start(datetime.now())
+    clock = SimulatedClock(start)
+    # Fake sheet only: no schedule snapshot or journal checkpoint of the live processes
+    cache = LessonCache(backend="fake")
+    tracker = CurrentLesson(clock=clock, cache=cache)
+
+    events = []
+    tracker.scheduler.on_lesson_start = lambda lesson, end: events.append((clock.now(), "start", lesson.name))
+    tracker.scheduler.on_lesson_end = lambda lesson, now: events.append((clock.now(), "end", lesson.name))
+
+    first = tracker.cache.schedule.next_lesson(start)
+    if first:
+        lesson, lesson_start = first
+
+        def edit_and_save():
+            sheet.set_value(f"A{lesson.row}", f"{lesson.name} (edited)")
+            cache.reload()  # The cache is passed in, so it is reloaded here like the lesson daemon does
+            tracker.scheduler.notify_changed()
+
+        clock.call_at(lesson_start + timedelta(minutes=5), edit_and_save)
+
+    wall_start = time.perf_counter()
+    tracker.scheduler.run(until=start + timedelta(days=7))
+    wall_time = time.perf_counter() - wall_start
+
+    for when, kind, name in events:
+        print(f"{when:%a %H:%M}  {kind:<5}  {name}")
+    print(f"\nSimulated 7 days in {wall_time * 1000:.2f} ms")
+    print(f"Clock waits: {clock.waits}, scheduler stats: {tracker.scheduler.stats}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    simulate_week()
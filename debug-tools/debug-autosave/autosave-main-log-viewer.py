@@ -5,7 +5,9 @@ import sys
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.insert(0, parent_dir)
 from config import activate_debug_mode, STATE_FILE_PATH
+from log_archiver import load_index, open_archive
 LOG_FILE_PATH = "logs/autosave.log"  # Relative path to the autosave log file
+PAST_LOGS_DIR = "logs/past-logs/Autosave"  # Archived sessions, listed in index.json
 
 def monitor_log_file(log_file_path):
     """Monitor the autosave log file and display its content in real time."""
@@ -37,8 +39,23 @@ def monitor_log_file(log_file_path):
     except KeyboardInterrupt:
         print("\nStopped monitoring.")
 
+def show_past_session(sessions_back):
+    """Print an archived session: 1 is the most recent one. Found through the archive index."""
+    sessions = load_index(PAST_LOGS_DIR)
+    if not 0 < sessions_back <= len(sessions):
+        print(f"Only {len(sessions)} archived sessions in {PAST_LOGS_DIR}.")
+        return
+    session = sessions[-sessions_back]
+    print(f"{session['file']} (started {session['started']}, {session['reason']})\n")
+    with open_archive(os.path.join(PAST_LOGS_DIR, session["file"])) as log_file:
+        for line in log_file:
+            print(line, end="")
+
 if __name__ == "__main__":
     if(activate_debug_mode):
-        monitor_log_file(LOG_FILE_PATH)
+        if len(sys.argv) > 1:  # autosave-main-log-viewer.py <N>: show the Nth most recent archived session
+            show_past_session(int(sys.argv[1]))
+        else:
+            monitor_log_file(LOG_FILE_PATH)
     else:
         print(f"To view debug outputs, please set activate_debug_mode in config.py to True")
\ No newline at end of file
@@ -0,0 +1,188 @@
+import os
+from contextlib import contextmanager
+from threading import Lock, Thread
+from config import SAVE_RWLOCK_FILE
+
+if os.name == "nt":
+    import msvcrt
+
+    try:
+        import win32file
+        import pywintypes
+    except ImportError:  # msvcrt locks only (no shared mode)
+        win32file = None
+else:
+    import fcntl
+
+# LockFileEx flags
+_LOCKFILE_FAIL_IMMEDIATELY = 0x1
+_LOCKFILE_EXCLUSIVE_LOCK = 0x2
+_LOCK_BYTES = 1  # Windows locks the first byte of the file; the file itself stays empty
+
+
+class FileRWLock:
+    """
+    Cross-process reader/writer lock on `path`, backed by flock on POSIX and a LockFileEx
+    byte-range lock (pywin32) on Windows. Many readers can hold it shared while a writer waits
+    for exclusive access; acquires sleep in the kernel, timed ones on a helper thread that is
+    joined for at most the timeout, and the OS drops the lock when its holder exits, so a
+    crashed saver never leaves it stuck.
+    Both lock kinds belong to the open file, so two instances also exclude each other within
+    one process (the saver and a post-save hook). One instance is held by one owner at a time.
+    Without pywin32, msvcrt only offers exclusive locks and shared acquires become exclusive.
+    """
+    def __init__(self, path=SAVE_RWLOCK_FILE):
+        self.path = path
+        self.fd = None
+        self.mode = None  # "shared" or "exclusive" while held
+        self._guard = Lock()
+
+    def _open_handle(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+
+    def _open(self):
+        if self.fd is None:
+            self.fd = self._open_handle()
+        return self.fd
+
+    @staticmethod
+    def _lock(fd, exclusive, blocking):
+        """
+        Takes the byte-range lock once. Returns False if blocking=False and it is held elsewhere.
+        """
+        if os.name != "nt":
+            flags = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(fd, flags)
+            except BlockingIOError:
+                return False
+            return True
+
+        if win32file is not None:
+            flags = (_LOCKFILE_EXCLUSIVE_LOCK if exclusive else 0) | (0 if blocking else _LOCKFILE_FAIL_IMMEDIATELY)
+            try:
+                win32file.LockFileEx(msvcrt.get_osfhandle(fd), flags, _LOCK_BYTES, 0, pywintypes.OVERLAPPED())
+            except pywintypes.error:
+                if blocking:
+                    raise
+                return False
+            return True
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, _LOCK_BYTES)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                # LK_LOCK gives up after ten one-second attempts; keep waiting
+
+    @staticmethod
+    def _unlock(fd):
+        if os.name != "nt":
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif win32file is not None:
+            win32file.UnlockFileEx(msvcrt.get_osfhandle(fd), _LOCK_BYTES, 0, pywintypes.OVERLAPPED())
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, _LOCK_BYTES)
+
+    def _wait_for_lock(self, exclusive, timeout):
+        """
+        Blocks in the kernel on a second handle to the file from a helper thread, joined for at
+        most `timeout` seconds. Returns the handle now holding the lock, or None on timeout; the
+        helper then keeps waiting and drops the lock as soon as it is granted.
+        """
+        fd = self._open_handle()
+        state = {"locked": False, "abandoned": False}
+        state_lock = Lock()
+
+        def wait():
+            try:
+                self._lock(fd, exclusive, blocking=True)
+            except Exception:  # OSError, or pywintypes.error on Windows
+                os.close(fd)
+                return
+            with state_lock:
+                if not state["abandoned"]:
+                    state["locked"] = True
+                    return
+            self._unlock(fd)
+            os.close(fd)
+
+        waiter = Thread(target=wait, name=f"lock-wait-{os.path.basename(self.path)}", daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+        with state_lock:
+            if state["locked"]:
+                return fd
+            state["abandoned"] = True
+        return None
+
+    def acquire(self, exclusive=False, timeout=None):
+        """
+        Blocks in the kernel until the lock is granted, for at most `timeout` seconds if given.
+        Returns False on timeout.
+        """
+        with self._guard:
+            if self.mode is not None:
+                raise RuntimeError(f"{self.path} is already held ({self.mode})")
+            if timeout is None:
+                self._lock(self._open(), exclusive, blocking=True)
+            elif not self._lock(self._open(), exclusive, blocking=False):
+                fd = self._wait_for_lock(exclusive, timeout)
+                if fd is None:
+                    return False
+                # The lock belongs to the helper's handle from now on
+                os.close(self.fd)
+                self.fd = fd
+            self.mode = "exclusive" if exclusive else "shared"
+            return True
+
+    def release(self):
+        with self._guard:
+            if self.mode is None:
+                return
+            self._unlock(self.fd)
+            self.mode = None
+
+    def close(self):
+        self.release()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    @contextmanager
+    def _held(self, exclusive, timeout):
+        if not self.acquire(exclusive, timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for {'exclusive' if exclusive else 'shared'} lock on {self.path}")
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def shared(self, timeout=None):
+        """
+        Context manager for read access; raises TimeoutError if it is not granted in time.
+        """
+        return self._held(False, timeout)
+
+    def exclusive(self, timeout=None):
+        """
+        Context manager for write access; raises TimeoutError if it is not granted in time.
+        """
+        return self._held(True, timeout)
+
+
+def create_exclusive(path, data=b""):
+    """
+    Creates `path` with O_EXCL and writes `data` to it. Raises FileExistsError if it already exists.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -5,8 +5,8 @@ import win32gui
 import logging
 import os
 from pathlib import Path
-from datetime import datetime
-import shutil
+from queue_logging import setup_logging, stop_logging
+from log_archiver import LogArchiver
 
 # Paths for logging and archiving
 logs_folder = Path("logs")
@@ -17,25 +17,24 @@ current_log_file = logs_folder / "escape_key_behavior.log"
 logs_folder.mkdir(exist_ok=True)
 past_logs_folder.mkdir(parents=True, exist_ok=True)
 
-# Logging setup
-logging.basicConfig(
-    filename=current_log_file,
-    filemode="w",  # Overwrite log each session
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    level=logging.INFO
+# Logging setup (written by a background listener so the keyboard loop never waits on the disk)
+setup_logging(
+    current_log_file,
+    mode="w",  # Start a new log each session (a log left by a crash is archived first)
+    fmt="%(asctime)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+    archiver=LogArchiver("Escape", past_logs_folder)
 )
 
 logging.info("Listening for the Escape key...")
 
 def archive_current_log():
-    """Archive the current log file to the past-logs directory."""
+    """Close the current log file and archive it (compressed and indexed) in the past-logs directory."""
     try:
-        timestamp = datetime.now().strftime("%m-%d-%y -- %H-%M-%S")
-        archived_log_file = past_logs_folder / f"Escape {timestamp}.log"
-        shutil.copy2(current_log_file, archived_log_file)
-        logging.info(f"Log file archived: {archived_log_file}")
+        logging.info(f"Archiving log file to {past_logs_folder}")
+        stop_logging()
     except Exception as e:
-        logging.error(f"Failed to archive log file: {e}")
+        print(f"Failed to archive log file: {e}")
 
 def is_excel_active():
     """Check if the active window belongs to Excel."""
@@ -0,0 +1,137 @@
+from datetime import time
+from weekly_schedule import MINUTES_PER_DAY, weekday_index
+
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def serial_to_minute(excel_serial):
+    """
+    Minute of the day (0-1439) of an Excel time serial, or None if the cell is not a number.
+    Seconds are rounded first so 16:59:59.9999 (float noise) reads as 17:00.
+    """
+    if not isinstance(excel_serial, (int, float)) or isinstance(excel_serial, bool):
+        return None
+    seconds = round((excel_serial % 1) * 86400)
+    return (seconds // 60) % MINUTES_PER_DAY
+
+
+def serial_to_minutes(excel_serial):
+    """
+    Length in whole minutes of an Excel duration serial (0.5 hours -> 30), or None.
+    """
+    if not isinstance(excel_serial, (int, float)) or isinstance(excel_serial, bool):
+        return None
+    return round(excel_serial * MINUTES_PER_DAY)
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_minute(minute):
+    return time(minute // 60, minute % 60) if minute is not None else None
+
+
+class Lesson:
+    """
+    One row of the "Lesson Schedule" sheet.
+    Times are stored as minutes since midnight and the weekday as an index (0 = Monday,
+    -1 if the sheet value is not a weekday). end_minute always falls back to start + duration,
+    so every module sees the same, complete set of fields.
+    """
+    __slots__ = ("name", "day", "start_minute", "end_minute", "duration", "people", "rate", "row")
+
+    def __init__(self, name, day, start_minute, end_minute=None, duration=None, people=1, rate=None, row=None):
+        self.name = name
+        self.day = day
+        self.start_minute = start_minute
+        self.duration = duration
+        if end_minute is None and start_minute is not None and duration is not None:
+            end_minute = (start_minute + duration) % MINUTES_PER_DAY
+        self.end_minute = end_minute
+        self.people = people
+        self.rate = rate
+        self.row = row
+
+    @classmethod
+    def from_values(cls, row, name, weekday, start_time, end_time=None, duration=None, people=None, rate=None):
+        """
+        Builds a lesson from raw cell values (weekday string, Excel serials for the times).
+        """
+        people = _to_number(people)
+        return cls(
+            name=name,
+            day=weekday_index(weekday),
+            start_minute=serial_to_minute(start_time),
+            end_minute=serial_to_minute(end_time),
+            duration=serial_to_minutes(duration),
+            people=int(people) if people else 1,
+            rate=_to_number(rate),
+            row=row,
+        )
+
+    @classmethod
+    def from_row(cls, row, values):
+        """
+        Builds a lesson from a {EXCEL_COLUMNS key: value} dict of one sheet row.
+        """
+        return cls.from_values(
+            row,
+            values.get("name"),
+            values.get("day_of_week"),
+            values.get("start_time"),
+            end_time=values.get("end_time"),
+            duration=values.get("duration"),
+            people=values.get("people"),
+            rate=values.get("rate"),
+        )
+
+    @property
+    def key(self):
+        """
+        Identifies the lesson slot across reloads, which rebuild the Lesson objects.
+        """
+        return (self.row, self.day, self.start_minute, self.end_minute)
+
+    @property
+    def weekday(self):
+        return WEEKDAY_NAMES[self.day] if 0 <= self.day < 7 else None
+
+    @property
+    def start_time(self):
+        return _format_minute(self.start_minute)
+
+    @property
+    def end_time(self):
+        return _format_minute(self.end_minute)
+
+    def as_dict(self):
+        """
+        Plain, picklable view of the lesson (times as HH:MM).
+        """
+        return {
+            "row": self.row,
+            "name": self.name,
+            "weekday": self.weekday,
+            "start_time": self.start_time.strftime("%H:%M") if self.start_minute is not None else None,
+            "end_time": self.end_time.strftime("%H:%M") if self.end_minute is not None else None,
+            "duration": self.duration,
+            "people": self.people,
+            "rate": self.rate,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Lesson):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return (f"Lesson(row={self.row}, name={self.name!r}, weekday={self.weekday}, "
+                f"start={self.start_time}, end={self.end_time}, people={self.people}, rate={self.rate})")
@@ -0,0 +1,246 @@
+import hashlib
+from collections import namedtuple
+from config import get_workbook_and_sheet, get_logger, WORKBOOK_BACKEND, SNAPSHOT_WAIT_TIMEOUT
+from weekly_schedule import WeeklySchedule
+from lesson import Lesson
+from change_journal import affected_rows
+from save_generation import saved_generation
+from workbook_backends import read_lesson_rows, read_row_spans
+
+# Rows that differ from the previous load, by row number
+LessonDelta = namedtuple("LessonDelta", ["changed", "inserted", "deleted"])
+NO_CHANGES = LessonDelta((), (), ())
+
+logger = get_logger("lesson_cache")
+
+
+def row_hash(values):
+    """
+    Hashes the lesson columns (EXCEL_COLUMNS) of one row.
+    """
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).digest()
+
+
+class LessonCache:
+    """
+    Keeps the lessons list in sync with the sheet without rebuilding it on every save.
+    Each row's lesson columns are hashed on load; a reload first compares the backend's cheap
+    fingerprint, then reads the lesson columns in one call and patches only the rows whose hash
+    changed. self.lessons is always updated in place, so callers can keep a reference to it.
+    self.schedule is the WeeklySchedule index, rebuilt only when the lesson set changes.
+    With a ChangeJournalReader, a reload reads only the rows named in the change journal and
+    falls back to the full comparison when the journal has a gap or a row was added or removed.
+    With a ScheduleSnapshot, lessons come from the snapshot the autosave publishes after every
+    save and the workbook is only read while no snapshot of the last saved generation exists.
+    """
+    def __init__(self, backend=None, journal=None, snapshot=None):
+        self.backend = backend
+        self.journal = journal
+        self.snapshot = snapshot
+        self.from_snapshot = False  # True while self.lessons came from the snapshot
+        self.lessons = []
+        self.schedule = WeeklySchedule([])
+        self.row_hashes = {}  # row -> hash of the lesson columns
+        self.fingerprint = None
+        self.loaded = False
+        self.stats = {"loads": 0, "reloads": 0, "skipped": 0, "rows_patched": 0, "journal_reloads": 0, "journal_fallbacks": 0,
+                      "snapshot_loads": 0, "snapshot_fallbacks": 0}
+
+    def _backend_fingerprint(self, workbook, sheet):
+        from workbook_backends import get_connection
+
+        return get_connection(self.backend or WORKBOOK_BACKEND).backend.fingerprint(workbook, sheet)
+
+    def _make_lesson(self, row, values):
+        return Lesson.from_row(row, values)
+
+    def _read_snapshot(self):
+        """
+        Lessons of the snapshot for the last successful save, or None if it is missing, late, or
+        does not match the workbook file on disk (ScheduleSnapshot checks its mtime and size).
+        """
+        generation = saved_generation()
+        found = self.snapshot.wait_for(generation, SNAPSHOT_WAIT_TIMEOUT)
+        if found is None:
+            self.stats["snapshot_fallbacks"] += 1
+            logger.info("No current schedule snapshot for save generation %d. Reading the workbook.", generation)
+            return None
+        return found[1]
+
+    @staticmethod
+    def _delta(previous, lessons):
+        """
+        LessonDelta between two lesson lists, matched by row.
+        """
+        current = {lesson.row: lesson for lesson in previous}
+        rows = {lesson.row: lesson for lesson in lessons}
+        return LessonDelta(
+            changed=tuple(row for row in rows if row in current and rows[row] != current[row]),
+            inserted=tuple(row for row in rows if row not in current),
+            deleted=tuple(row for row in current if row not in rows),
+        )
+
+    def _apply_snapshot(self, lessons):
+        """
+        Swaps in the snapshot's lessons and returns the LessonDelta against the previous list.
+        """
+        delta = self._delta(self.lessons, lessons)
+        if delta.changed or delta.inserted or delta.deleted or not self.loaded:
+            self.lessons[:] = lessons
+            self.schedule = WeeklySchedule(self.lessons)
+        # Row hashes and the fingerprint describe workbook reads only
+        self.row_hashes = {}
+        self.fingerprint = None
+        self.from_snapshot = True
+        self.loaded = True
+        self.stats["snapshot_loads"] += 1
+        return delta
+
+    def load(self):
+        """
+        Full load: takes the schedule snapshot when one is available, otherwise rebuilds every
+        lesson and its row hash from the workbook.
+        """
+        if self.snapshot is not None:
+            lessons = self._read_snapshot()
+            if lessons is not None:
+                self._apply_snapshot(lessons)
+                self.stats["loads"] += 1
+                logger.info("Loaded %d lessons from the schedule snapshot.", len(self.lessons))
+                return self.lessons
+        return self._load_workbook()
+
+    def _load_workbook(self):
+        workbook, sheet = get_workbook_and_sheet(backend=self.backend)
+        if self.journal is not None:
+            self.journal.seek_end()  # Everything journaled so far is covered by this read
+        self.fingerprint = self._backend_fingerprint(workbook, sheet)
+        rows = read_lesson_rows(sheet)
+
+        self.row_hashes = {row: row_hash(tuple(values.values())) for row, values in rows.items()}
+        self.lessons[:] = [self._make_lesson(row, values) for row, values in rows.items()]
+        self.schedule = WeeklySchedule(self.lessons)
+        self.loaded = True
+        self.from_snapshot = False
+        if self.journal is not None:
+            self.journal.commit()
+        self.stats["loads"] += 1
+        logger.info("Loaded %d lessons.", len(self.lessons))
+        return self.lessons
+
+    def reload(self):
+        """
+        Incremental reload after a save. Returns the LessonDelta that was applied.
+        """
+        if not self.loaded:
+            self.load()
+            return LessonDelta((), tuple(lesson.row for lesson in self.lessons), ())
+
+        if self.snapshot is not None:
+            lessons = self._read_snapshot()
+            if lessons is not None:
+                delta = self._apply_snapshot(lessons)
+                self.stats["reloads"] += 1
+                logger.info(
+                    "Lessons reloaded from the schedule snapshot: %d changed, %d inserted, %d deleted.",
+                    len(delta.changed), len(delta.inserted), len(delta.deleted),
+                )
+                return delta
+            if self.from_snapshot:
+                # No row hashes to compare against: read the workbook in full
+                previous = list(self.lessons)
+                self._load_workbook()
+                self.stats["reloads"] += 1
+                return self._delta(previous, self.lessons)
+
+        workbook, sheet = get_workbook_and_sheet(backend=self.backend)
+        fingerprint = self._backend_fingerprint(workbook, sheet)
+        if fingerprint is not None and fingerprint == self.fingerprint:
+            self.stats["skipped"] += 1
+            logger.info("Workbook fingerprint unchanged. Lessons are up to date.")
+            return NO_CHANGES
+
+        if self.journal is not None:
+            delta = self._reload_from_journal(sheet, fingerprint)
+            if delta is not None:
+                return delta
+            self.journal.seek_end()
+
+        rows = read_lesson_rows(sheet)
+        new_hashes = {row: row_hash(tuple(values.values())) for row, values in rows.items()}
+        delta = LessonDelta(
+            changed=tuple(row for row in new_hashes if row in self.row_hashes and new_hashes[row] != self.row_hashes[row]),
+            inserted=tuple(row for row in new_hashes if row not in self.row_hashes),
+            deleted=tuple(row for row in self.row_hashes if row not in new_hashes),
+        )
+
+        if delta.changed or delta.inserted or delta.deleted:
+            # Keep the lesson objects of untouched rows, rebuild only the rest
+            current = {lesson.row: lesson for lesson in self.lessons}
+            patch = set(delta.changed) | set(delta.inserted)
+            self.lessons[:] = [
+                self._make_lesson(row, values) if row in patch else current[row]
+                for row, values in rows.items()
+            ]
+            self.schedule = WeeklySchedule(self.lessons)
+            self.stats["rows_patched"] += len(patch) + len(delta.deleted)
+
+        self.row_hashes = new_hashes
+        self.fingerprint = fingerprint
+        if self.journal is not None:
+            self.journal.commit()
+        self.stats["reloads"] += 1
+        logger.info(
+            "Lessons reloaded: %d changed, %d inserted, %d deleted.",
+            len(delta.changed), len(delta.inserted), len(delta.deleted),
+        )
+        return delta
+
+    def _reload_from_journal(self, sheet, fingerprint):
+        """
+        Patches only the rows named in the change journal. Returns the LessonDelta, or None when
+        a full reload is needed (journal gap, whole-row or whole-column edit, or a lesson row added or removed).
+        """
+        batch = self.journal.read()
+        rows = None if batch.gap else affected_rows(batch.records)
+        if rows is None:
+            self.stats["journal_fallbacks"] += 1
+            logger.info("Change journal unusable (%s). Falling back to a full reload.", batch.reason or "whole rows or columns changed")
+            return None
+
+        last_row = max(self.row_hashes, default=None)
+        values = read_row_spans(sheet, rows) if rows else {}
+        changed = {}  # row -> new hash, applied only if no fallback is needed
+        for row in sorted(values):
+            name = values[row]["name"]
+            blank = not name or str(name).strip() == ""
+            if row in self.row_hashes:
+                if blank:
+                    return self._journal_fallback("lesson row removed")
+            elif not blank and (last_row is None or row == last_row + 1):
+                return self._journal_fallback("lesson row added")
+            else:
+                continue  # Outside the lesson block
+            new_hash = row_hash(tuple(values[row].values()))
+            if new_hash != self.row_hashes[row]:
+                changed[row] = new_hash
+
+        if changed:
+            positions = {lesson.row: index for index, lesson in enumerate(self.lessons)}
+            for row, new_hash in changed.items():
+                self.row_hashes[row] = new_hash
+                self.lessons[positions[row]] = self._make_lesson(row, values[row])
+            self.schedule = WeeklySchedule(self.lessons)
+            self.stats["rows_patched"] += len(changed)
+
+        self.fingerprint = fingerprint
+        self.journal.commit()
+        self.stats["reloads"] += 1
+        self.stats["journal_reloads"] += 1
+        logger.info("Lessons reloaded from the change journal: %d rows read, %d changed.", len(values), len(changed))
+        return LessonDelta(tuple(changed), (), ())
+
+    def _journal_fallback(self, reason):
+        self.stats["journal_fallbacks"] += 1
+        logger.info("Change journal: %s. Falling back to a full reload.", reason)
+        return None
@@ -0,0 +1,269 @@
+import os
+import sys
+import time
+import secrets
+import logging
+from datetime import datetime
+from threading import Thread, RLock
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from config import LESSON_DAEMON_ADDRESS, LESSON_DAEMON_AUTHKEY_FILE, LESSON_DAEMON_QUERY_TIMEOUT, get_connection_stats
+from lesson_cache import LessonCache
+from change_journal import ChangeJournalReader
+from schedule_snapshot import ScheduleSnapshot
+from lock_monitor import LockFileMonitor, SAVE_FINISHED
+from save_generation import saved_generation
+
+# Logging setup
+logging.basicConfig(
+    format="%(asctime)s - %(message)s",
+    level=logging.INFO
+)
+
+QUERIES = ("next", "current", "table")
+STATS = "stats"  # Daemon, cache and workbook connection counters
+
+
+def _lesson_summary(lesson):
+    """
+    Plain, picklable view of a lesson for IPC clients.
+    """
+    return lesson.as_dict()
+
+
+def daemon_authkey(create=False, path=LESSON_DAEMON_AUTHKEY_FILE):
+    """
+    Returns the daemon's shared secret. The daemon creates it once per install (create=True)
+    as a random key readable only by the current user; clients raise FileNotFoundError until then.
+    """
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        if not create:
+            raise
+    key = secrets.token_bytes(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return daemon_authkey(path=path)  # Created concurrently
+    with os.fdopen(fd, "wb") as file:
+        file.write(key)
+    return key
+
+
+def _listener_address():
+    """
+    Named pipe on Windows, Unix socket elsewhere. A stale socket file from a crashed daemon is removed.
+    """
+    address = LESSON_DAEMON_ADDRESS
+    if isinstance(address, str) and not address.startswith("\\\\") and os.path.exists(address):
+        os.unlink(address)
+    return address
+
+
+class LessonDaemon:
+    """
+    Single long-running process that owns the lesson cache.
+    It reloads once per save (via LockFileMonitor), drives the CurrentLesson scheduler from the
+    same cache and answers "next", "current", "table" and "stats" queries over a local IPC endpoint,
+    so NextLesson, CurrentLesson and reinitialize views no longer fetch the sheet separately.
+    """
+    def __init__(self, cache=None, clock=None, run_current_lesson=True):
+        self.cache = cache or LessonCache(journal=ChangeJournalReader(consumer="lesson_daemon"), snapshot=ScheduleSnapshot())
+        self.lock = RLock()  # Guards the cache while it is patched or read
+        self.clock = clock
+        self.run_current_lesson = run_current_lesson
+        self.tracker = None
+        self.monitor = None
+        self.listener = None
+        self.generation = 0  # Last successful save the cache reflects
+        self.stats = {"queries": 0, "reloads": 0}
+
+    def reload(self):
+        generation = saved_generation()
+        with self.lock:
+            delta = self.cache.reload()
+            self.generation = generation
+            self.stats["reloads"] += 1
+        if self.tracker is not None:
+            self.tracker.scheduler.notify_changed()
+        return delta
+
+    def _on_lock_event(self, event):
+        if event == SAVE_FINISHED:
+            self.reload()
+
+    def handle_query(self, query):
+        """
+        Answers one query. Returns a dict with either a "result" or an "error" key, and the
+        save generation the answer reflects.
+        """
+        with self.lock:
+            self.stats["queries"] += 1
+            if query == STATS:
+                return {"result": self.collect_stats(), "generation": self.generation}
+            if query not in QUERIES:
+                return {"error": f"Unknown query '{query}'. Expected one of: {', '.join(QUERIES + (STATS,))}"}
+            return {"result": answer(self.cache, query), "generation": self.generation}
+
+    def collect_stats(self):
+        """
+        Counters of the daemon, its lesson cache and the cached workbook connection it reads through.
+        """
+        return {
+            "daemon": dict(self.stats),
+            "cache": dict(self.cache.stats),
+            "connection": get_connection_stats(self.cache.backend),
+        }
+
+    def _serve_client(self, conn):
+        with conn:
+            while True:
+                try:
+                    query = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self.handle_query(query))
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return  # Listener closed
+            except Exception as e:
+                logging.error(f"Rejected IPC client: {e}")
+                continue
+            Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def start(self):
+        generation = saved_generation()
+        with self.lock:
+            if not self.cache.loaded:
+                self.cache.load()
+            self.generation = generation
+
+        self.monitor = LockFileMonitor()
+        self.monitor.subscribe(self._on_lock_event)
+        self.monitor.start()
+
+        self.listener = Listener(_listener_address(), authkey=daemon_authkey(create=True))
+        Thread(target=self._accept_loop, daemon=True).start()
+        logging.info(f"Lesson daemon listening on {self.listener.address}")
+
+        if self.run_current_lesson:
+            from CurrentLesson import CurrentLesson
+
+            self.tracker = CurrentLesson(clock=self.clock, cache=self.cache)
+        return self
+
+    def stop(self):
+        if self.tracker is not None:
+            self.tracker.scheduler.stop()
+        if self.monitor is not None:
+            self.monitor.stop()
+        if self.listener is not None:
+            self.listener.close()
+
+    def run_forever(self):
+        try:
+            if self.tracker is not None:
+                self.tracker.scheduler.run()
+            else:
+                self.monitor.run_forever()
+        except KeyboardInterrupt:
+            logging.info("Program interrupted. Exiting...")
+        finally:
+            self.stop()
+
+
+def answer(cache, query, now=None):
+    """
+    Result of a "next", "current" or "table" query against a LessonCache, as plain dicts.
+    """
+    now = now or datetime.now()
+    if query == "table":
+        return [_lesson_summary(lesson) for lesson in cache.lessons]
+    if query == "next":
+        found = cache.schedule.next_lesson(now)
+        key = "lesson_datetime"
+    else:
+        found = cache.schedule.lesson_at(now)
+        key = "ends_at"
+    if not found:
+        return None
+    lesson, when = found
+    return {**_lesson_summary(lesson), key: when.isoformat()}
+
+
+def query(kind, min_generation=0, timeout=LESSON_DAEMON_QUERY_TIMEOUT, address=LESSON_DAEMON_ADDRESS):
+    """
+    Sends one query to a running daemon and returns its result. With min_generation, repeats
+    the query until the daemon has reloaded that save (or `timeout` expires).
+    Raises OSError when no daemon is running and RuntimeError on query errors.
+    """
+    deadline = time.monotonic() + timeout
+    with Client(address, authkey=daemon_authkey()) as conn:
+        while True:
+            conn.send(kind)
+            response = conn.recv()
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            if response["generation"] >= min_generation or time.monotonic() >= deadline:
+                return response["result"]
+            time.sleep(0.05)
+
+
+class LessonClient:
+    """
+    Lesson views for NextLesson and reinitialize: answered by the lesson daemon when it runs,
+    so every view is served from its single fetch, and read locally through a LessonCache
+    of their own only while no daemon is reachable.
+    """
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.cache = None
+        self.using_daemon = None
+
+    def _use(self, using_daemon):
+        if using_daemon != self.using_daemon:
+            logging.info("Lessons served by the lesson daemon." if using_daemon else
+                         "Lesson daemon not running. Reading the lessons locally.")
+            self.using_daemon = using_daemon
+
+    def get(self, kind, after_save=False):
+        """
+        Returns the answer to `kind` ("next", "current" or "table"). after_save=True makes sure
+        it reflects the save that just finished.
+        """
+        try:
+            result = query(kind, min_generation=saved_generation() if after_save else 0)
+            self._use(True)
+            return result
+        except (OSError, EOFError, AuthenticationError):
+            self._use(False)
+        if self.cache is None:
+            self.cache = LessonCache(journal=ChangeJournalReader(consumer=self.consumer), snapshot=ScheduleSnapshot())
+            self.cache.load()
+        elif after_save:
+            self.cache.reload()
+        return answer(self.cache, kind)
+
+
+if __name__ == "__main__":
+    # python lesson_daemon.py [next|current|table|stats]
+    #   run the daemon, or send one query to the running daemon and print the answer
+    if len(sys.argv) > 1:
+        from tabulate import tabulate
+
+        result = query(sys.argv[1])
+        if isinstance(result, list):
+            print(tabulate(result, headers="keys", tablefmt="grid"))
+        elif sys.argv[1] == STATS:
+            for section, counters in result.items():
+                print(f"{section}: {counters}")
+        else:
+            print(result)
+    else:
+        LessonDaemon().start().run_forever()
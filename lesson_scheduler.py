@@ -0,0 +1,145 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from threading import Event
+
+# Boundary kinds; ends sort before starts so back-to-back lessons hand over cleanly
+LESSON_END = 0
+LESSON_START = 1
+
+
+class SystemClock:
+    """
+    Wall clock: sleeps on the wakeup event until the timeout expires or it is set.
+    """
+    def now(self):
+        return datetime.now()
+
+    def wait(self, event, timeout):
+        return event.wait(timeout)
+
+
+class SimulatedClock:
+    """
+    Virtual clock for tests and simulations. wait() returns immediately and moves the virtual
+    time forward by the timeout, so a whole week of lessons can be replayed in milliseconds.
+    Callbacks registered with call_at run when the virtual time reaches them and may set the
+    wakeup event (e.g. to simulate a save while a lesson is in session).
+    """
+    def __init__(self, start):
+        self.current = start
+        self.timers = []  # heap of (when, seq, callback)
+        self._seq = 0
+        self.waits = 0
+
+    def now(self):
+        return self.current
+
+    def call_at(self, when, callback):
+        heapq.heappush(self.timers, (when, self._seq, callback))
+        self._seq += 1
+
+    def wait(self, event, timeout):
+        self.waits += 1
+        if event.is_set():
+            return True
+        deadline = None if timeout is None else self.current + timedelta(seconds=timeout)
+
+        if self.timers and (deadline is None or self.timers[0][0] <= deadline):
+            when, _, callback = heapq.heappop(self.timers)
+            self.current = max(self.current, when)
+            callback()
+            if event.is_set():
+                return True
+            return self.wait(event, None if deadline is None else (deadline - self.current).total_seconds())
+
+        if deadline is None:
+            raise RuntimeError("Simulated clock would wait forever: no lessons and no pending events.")
+        self.current = deadline
+        return False
+
+
+class LessonScheduler:
+    """
+    Tracks the lesson in session by sleeping exactly until the next boundary.
+    A timer heap holds the upcoming lesson start and the current lesson's end; the loop waits on
+    a single Event with the time to the earliest entry as timeout, so it wakes only at a
+    boundary or when notify_changed() signals new lesson data.
+    """
+    def __init__(self, get_schedule, clock=None, on_lesson_start=None, on_lesson_end=None, on_data_changed=None):
+        self.get_schedule = get_schedule  # Callable returning the current WeeklySchedule
+        self.clock = clock or SystemClock()
+        self.on_lesson_start = on_lesson_start
+        self.on_lesson_end = on_lesson_end
+        self.on_data_changed = on_data_changed
+        self.current = None  # (lesson, end_datetime) in session
+        self.wakeup = Event()
+        self.stopped = False
+        self.stats = {"wakeups": 0, "boundaries": 0, "data_changes": 0}
+
+    def notify_changed(self):
+        """
+        Called (from any thread) when the lesson data was reinitialized.
+        """
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+
+    def _sync(self, now):
+        """
+        Compares the lesson in session at `now` with the last known one and fires the callbacks.
+        Lessons are compared by Lesson.key: a reload creates new objects for unchanged lessons.
+        """
+        found = self.get_schedule().lesson_at(now)
+        previous = self.current[0] if self.current else None
+        lesson = found[0] if found else None
+        if (lesson.key if lesson else None) == (previous.key if previous else None):
+            self.current = found
+            return
+
+        self.stats["boundaries"] += 1
+        if previous is not None and self.on_lesson_end:
+            self.on_lesson_end(previous, now)
+        self.current = found
+        if lesson is not None and self.on_lesson_start:
+            self.on_lesson_start(lesson, found[1])
+
+    def _timers(self, now):
+        """
+        Builds the heap of upcoming boundaries after `now`.
+        """
+        timers = []
+        if self.current:
+            heapq.heappush(timers, (self.current[1], LESSON_END))
+        upcoming = self.get_schedule().next_lesson(now)
+        if upcoming:
+            heapq.heappush(timers, (upcoming[1], LESSON_START))
+        return timers
+
+    def run(self, until=None):
+        """
+        Runs until stop() is called or the clock reaches `until`.
+        """
+        while not self.stopped:
+            now = self.clock.now()
+            if until is not None and now >= until:
+                break
+            self._sync(now)
+
+            timers = self._timers(now)
+            deadline = timers[0][0] if timers else None
+            if until is not None and (deadline is None or until < deadline):
+                deadline = until
+            timeout = None if deadline is None else max(0.0, (deadline - now).total_seconds())
+
+            self.stats["wakeups"] += 1
+            if self.clock.wait(self.wakeup, timeout):
+                self.wakeup.clear()
+                if self.stopped:
+                    break
+                self.stats["data_changes"] += 1
+                logging.info("Lesson data changed. Rebuilding lesson timers.")
+                if self.on_data_changed:
+                    self.on_data_changed()
@@ -0,0 +1,163 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from config import EXCEL_FILE, EXCEL_SHEET, EXCEL_COLUMNS, get_logger
+from lesson import Lesson
+
+# SpreadsheetML namespaces
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DEFAULT_SHEET_PATH = "xl/worksheets/sheet1.xml"
+
+logger = get_logger("lesson_source")
+
+
+def split_cell_ref(ref):
+    """
+    Splits a cell reference such as 'G12' into its column letters and row number.
+    """
+    index = 0
+    while index < len(ref) and ref[index].isalpha():
+        index += 1
+    return ref[:index], int(ref[index:])
+
+
+class LessonSource:
+    """
+    Excel-free reader for the lesson workbook.
+    Opens the .xlsm as a zip archive, resolves the shared strings once and streams the
+    worksheet XML with iterparse, keeping only the configured lesson columns.
+    Values are the cached results Excel stored on the last save, so formulas are not evaluated.
+    """
+    def __init__(self, path=EXCEL_FILE, sheet_name=EXCEL_SHEET, columns=None):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.columns = dict(columns or EXCEL_COLUMNS)  # key -> column letter
+        self._keys_by_column = {col: key for key, col in self.columns.items()}
+
+    def _read_shared_strings(self, archive):
+        """
+        Loads xl/sharedStrings.xml into a list indexed by the string id.
+        """
+        try:
+            source = archive.open("xl/sharedStrings.xml")
+        except KeyError:
+            return []
+
+        strings = []
+        with source:
+            for _, elem in ET.iterparse(source):
+                if elem.tag == f"{MAIN_NS}si":
+                    # Rich text strings are split over several <t> runs
+                    strings.append("".join(t.text or "" for t in elem.iter(f"{MAIN_NS}t")))
+                    elem.clear()
+        return strings
+
+    def _resolve_sheet_path(self, archive):
+        """
+        Finds the worksheet part for self.sheet_name through workbook.xml and its relationships.
+        Falls back to sheet1.xml when the lookup fails.
+        """
+        try:
+            workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+            rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+        except KeyError:
+            return DEFAULT_SHEET_PATH
+
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{PKG_REL_NS}Relationship")}
+        for sheet in workbook.iter(f"{MAIN_NS}sheet"):
+            if sheet.get("name") == self.sheet_name:
+                target = targets.get(sheet.get(f"{REL_NS}id"))
+                if target:
+                    if target.startswith("/"):
+                        return target.lstrip("/")
+                    return posixpath.normpath(posixpath.join("xl", target))
+
+        logger.warning("Sheet '%s' not found in workbook.xml. Using %s.", self.sheet_name, DEFAULT_SHEET_PATH)
+        return DEFAULT_SHEET_PATH
+
+    def _cell_value(self, cell, shared_strings):
+        """
+        Returns the cached value of a <c> element as a Python object.
+        """
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            return "".join(t.text or "" for t in cell.iter(f"{MAIN_NS}t")) or None
+
+        value = cell.find(f"{MAIN_NS}v")
+        if value is None or not value.text:
+            return None
+        text = value.text
+
+        if cell_type == "s":
+            return shared_strings[int(text)]
+        if cell_type == "b":
+            return text == "1"
+        if cell_type in ("str", "e"):
+            return text
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+    def iter_rows(self, min_row=2):
+        """
+        Streams the sheet and yields (row_number, values) for every row that has a cell in one of
+        the configured columns. values maps each EXCEL_COLUMNS key to its cached value (or None).
+        Each <row> element is discarded once read, so memory does not grow with the sheet size.
+        """
+        with zipfile.ZipFile(self.path) as archive:
+            shared_strings = self._read_shared_strings(archive)
+            sheet_path = self._resolve_sheet_path(archive)
+
+            with archive.open(sheet_path) as source:
+                context = ET.iterparse(source, events=("start", "end"))
+                _, root = next(context)
+                sheet_data = None
+
+                for event, elem in context:
+                    if event == "start":
+                        if elem.tag == f"{MAIN_NS}sheetData":
+                            sheet_data = elem
+                        continue
+                    if elem.tag != f"{MAIN_NS}row":
+                        continue
+
+                    row_number = int(elem.get("r"))
+                    values = None
+                    if row_number >= min_row:
+                        for cell in elem.iter(f"{MAIN_NS}c"):
+                            column, _ = split_cell_ref(cell.get("r"))
+                            key = self._keys_by_column.get(column)
+                            if key is None:
+                                continue
+                            if values is None:
+                                values = dict.fromkeys(self.columns)
+                            values[key] = self._cell_value(cell, shared_strings)
+
+                    # Drop the parsed row so the tree never holds more than one of them
+                    elem.clear()
+                    if sheet_data is not None:
+                        sheet_data.remove(elem)
+
+                    if values is not None:
+                        yield row_number, values
+                root.clear()
+
+    def fetch_data(self):
+        """
+        Returns the lessons as Lesson records, like NextLesson.fetch_data:
+        consecutive rows from row 2 until the first blank name.
+        """
+        lessons = []
+        expected_row = 2
+        for row, values in self.iter_rows():
+            name = values.get("name")
+            if row != expected_row or not name or str(name).strip() == "":
+                break
+            lessons.append(Lesson.from_row(row, values))
+            expected_row += 1
+
+        logger.info("Fetched %d lessons from %s.", len(lessons), self.path)
+        return lessons
@@ -0,0 +1,186 @@
+import os
+import queue
+import logging
+from threading import Thread, Event, Lock
+from config import SAVE_LOCK_FILE, SAVE_STATE_FILE, LOCK_POLL_MIN_INTERVAL, LOCK_POLL_MAX_INTERVAL
+from save_generation import read_save_state, SAVED
+from file_lock import FileRWLock
+
+# Events delivered to subscribers
+SAVE_STARTED = "save_started"
+SAVE_FINISHED = "save_finished"
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # Polling fallback only
+    Observer = None
+    FileSystemEventHandler = object
+
+
+def _normalize(path):
+    if isinstance(path, bytes):
+        path = os.fsdecode(path)
+    return os.path.normcase(os.path.abspath(path))
+
+
+class LockFileHandler(FileSystemEventHandler):
+    """
+    Watchdog handler that reports creation and removal of the autosave lock file.
+    """
+    def __init__(self, monitor):
+        super().__init__()
+        self.monitor = monitor
+
+    def on_created(self, event):
+        if _normalize(event.src_path) == self.monitor.lock_path:
+            self.monitor.set_saving(True)
+
+    def on_deleted(self, event):
+        if _normalize(event.src_path) == self.monitor.lock_path:
+            self.monitor.set_saving(False)
+
+    def on_moved(self, event):
+        if _normalize(event.src_path) == self.monitor.lock_path:
+            self.monitor.set_saving(False)
+        elif _normalize(event.dest_path) == self.monitor.lock_path:
+            self.monitor.set_saving(True)
+
+
+class LockFileMonitor:
+    """
+    Shared notification service for the autosave lock file.
+    Subscribers receive SAVE_STARTED when the lock file appears and SAVE_FINISHED when it is
+    removed. Events come from watchdog when available; otherwise a polling thread is used whose
+    interval backs off while nothing happens. While a save is running the poller does not spin:
+    it blocks in the kernel on the shared save lock, which the saver releases after the lock file.
+    Callbacks run on one dispatcher thread, in order, so a slow subscriber never delays detection.
+    SAVE_FINISHED is only delivered when the save state file reports a new "saved" generation;
+    failed saves and repeated notifications for the same generation are skipped.
+    """
+    def __init__(self, lock_file=SAVE_LOCK_FILE, use_watchdog=True,
+                 min_interval=LOCK_POLL_MIN_INTERVAL, max_interval=LOCK_POLL_MAX_INTERVAL,
+                 state_file=SAVE_STATE_FILE):
+        self.lock_path = _normalize(lock_file)
+        self.state_file = state_file
+        record = read_save_state(state_file)
+        self.generation = record["generation"] if record else None
+        self.use_watchdog = use_watchdog and Observer is not None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.saving = os.path.exists(self.lock_path)
+        self.subscribers = []
+        self.stop_flag = Event()
+        self._state_lock = Lock()
+        self._events = queue.Queue()
+        self._observer = None
+        self._threads = []
+        self._save_lock = FileRWLock()
+
+    def subscribe(self, callback):
+        """
+        Registers callback(event) for SAVE_STARTED / SAVE_FINISHED.
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def set_saving(self, saving):
+        """
+        Records the lock file state and queues an event on every transition.
+        """
+        with self._state_lock:
+            if saving == self.saving:
+                return
+            self.saving = saving
+        event = SAVE_STARTED if saving else SAVE_FINISHED
+        logging.info(f"Lock file {'detected' if saving else 'removed'}: {event}.")
+        if event == SAVE_FINISHED and not self._new_generation():
+            return
+        self._events.put(event)
+
+    def _new_generation(self):
+        """
+        Checks the save state written before the lock file was removed.
+        Without a state file (older autosave) every removal counts as a finished save.
+        """
+        record = read_save_state(self.state_file)
+        if record is None:
+            return True
+        if record.get("state") != SAVED:
+            logging.info(f"Save generation {record['generation']} did not complete ({record.get('state')}). Skipping reload.")
+            return False
+        if record["generation"] == self.generation:
+            logging.info(f"Save generation {record['generation']} unchanged. Skipping reload.")
+            return False
+        self.generation = record["generation"]
+        return True
+
+    def _dispatch(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            for callback in list(self.subscribers):
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Lock file subscriber failed on {event}: {e}")
+
+    def _poll(self):
+        interval = self.min_interval
+        while not self.stop_flag.wait(interval):
+            exists = os.path.exists(self.lock_path)
+            if exists != self.saving:
+                self.set_saving(exists)
+                interval = self.min_interval
+            elif exists:
+                # Save in progress: sleep until the saver releases its exclusive lock
+                with self._save_lock.shared():
+                    pass
+                interval = self.min_interval
+            else:
+                interval = min(interval * 2, self.max_interval)
+
+    def start(self):
+        dispatcher = Thread(target=self._dispatch, daemon=True)
+        dispatcher.start()
+        self._threads.append(dispatcher)
+
+        if self.use_watchdog:
+            try:
+                os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+                self._observer = Observer()
+                self._observer.schedule(LockFileHandler(self), os.path.dirname(self.lock_path), recursive=False)
+                self._observer.start()
+                logging.info(f"Watching {self.lock_path} with watchdog.")
+                # Catch a transition that happened before the observer was running
+                self.set_saving(os.path.exists(self.lock_path))
+                return self
+            except Exception as e:
+                logging.error(f"Watchdog unavailable ({e}). Falling back to polling.")
+                self._observer = None
+
+        poller = Thread(target=self._poll, daemon=True)
+        poller.start()
+        self._threads.append(poller)
+        logging.info(f"Polling {self.lock_path} every {self.min_interval}-{self.max_interval}s.")
+        return self
+
+    def stop(self):
+        self.stop_flag.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        self._events.put(None)
+
+    def run_forever(self):
+        """
+        Blocks the calling thread until stop() is called or Ctrl+C is pressed.
+        """
+        try:
+            while not self.stop_flag.wait(1):
+                pass
+        except KeyboardInterrupt:
+            logging.info("Program interrupted. Exiting...")
+        finally:
+            self.stop()
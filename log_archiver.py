@@ -0,0 +1,262 @@
+import io
+import os
+import sys
+import gzip
+import json
+import queue
+import shutil
+import logging
+from datetime import datetime, timedelta
+from threading import Thread, Lock
+from config import LOG_ARCHIVE_MAX_FILES, LOG_ARCHIVE_MAX_BYTES, LOG_ARCHIVE_MAX_AGE_DAYS, LOG_ARCHIVE_COMPRESSION
+
+try:
+    import zstandard
+except ImportError:  # gzip only
+    zstandard = None
+
+INDEX_FILE = "index.json"
+PART_SUFFIX = ".part"
+TIMESTAMP_FORMAT = "%m-%d-%y -- %H-%M-%S"  # Same naming as the archives written before
+CHUNK_SIZE = 1024 * 1024
+
+
+def load_index(archive_dir):
+    """
+    Returns the index entries of an archive directory, oldest first ([] if there is none).
+    """
+    try:
+        with open(os.path.join(archive_dir, INDEX_FILE), "r") as file:
+            return json.load(file)["sessions"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def open_archive(path):
+    """
+    Opens an archived log (.gz, .zst or plain) for reading text.
+    """
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("Reading .zst archives requires the zstandard package")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8", errors="replace")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def _first_timestamp(line):
+    try:
+        return datetime.strptime(line[:19], "%Y-%m-%d %H:%M:%S").isoformat()
+    except ValueError:
+        return None
+
+
+class LogArchiver:
+    """
+    Archives finished log files of one program into `archive_dir`.
+    A log is handed off by renaming it to a .part file next to the archives (cheap, and safe
+    against a crash), then a background thread streams it through gzip or zstd, records it in
+    index.json and applies the retention limits (count, total bytes, age). Leftover .part files
+    and uncompressed archives from older versions are picked up when the archiver starts.
+    """
+    def __init__(self, program, archive_dir, max_files=LOG_ARCHIVE_MAX_FILES, max_bytes=LOG_ARCHIVE_MAX_BYTES,
+                 max_age_days=LOG_ARCHIVE_MAX_AGE_DAYS, compression=LOG_ARCHIVE_COMPRESSION):
+        self.program = program
+        self.archive_dir = os.fspath(archive_dir)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        if compression == "zstd" and zstandard is None:
+            logging.warning("zstandard is not installed. Compressing log archives with gzip.")
+            compression = "gzip"
+        self.compression = compression
+        self.index_lock = Lock()
+        self._jobs = queue.Queue()
+        self._worker = None
+        self._seq = 0
+        self.stats = {"archived": 0, "removed": 0, "bytes_in": 0, "bytes_out": 0, "failures": 0}
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    # Producer side
+
+    def hand_off(self, path, reason="session"):
+        """
+        Moves a finished log out of the way and queues it for compression.
+        Returns False if there was nothing to archive.
+        """
+        path = os.fspath(path)
+        try:
+            if os.path.getsize(path) == 0:
+                return False
+        except FileNotFoundError:
+            return False
+
+        self._seq += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        part = os.path.join(self.archive_dir, f".{self.program}-{stamp}-{self._seq}-{reason}{PART_SUFFIX}")
+        try:
+            os.replace(path, part)
+        except OSError:
+            shutil.move(path, part)  # Different drive
+        self._jobs.put(part)
+        return True
+
+    def recover(self, path):
+        """
+        Archives a log left behind by a previous run that did not shut down cleanly.
+        """
+        return self.hand_off(path, reason="recovered")
+
+    def rotator(self, source, dest):
+        """
+        Rotator for logging.handlers.RotatingFileHandler / TimedRotatingFileHandler:
+        rolled segments are archived instead of being kept as .1, .2, ...
+        """
+        self.hand_off(source, reason="rolled")
+
+    # Worker side
+
+    def _archive_name(self):
+        extension = ".log.zst" if self.compression == "zstd" else ".log.gz"
+        name = f"{self.program} {datetime.now().strftime(TIMESTAMP_FORMAT)}"
+        candidate, counter = f"{name}{extension}", 1
+        while os.path.exists(os.path.join(self.archive_dir, candidate)):
+            counter += 1
+            candidate = f"{name} ({counter}){extension}"
+        return candidate
+
+    def _compress(self, source, destination):
+        """
+        Streams `source` into `destination` chunk by chunk. Returns the timestamp of its first line.
+        """
+        temp_path = f"{destination}.{os.getpid()}.tmp"
+        with open(source, "rb") as src:
+            first_line = src.readline(256).decode("utf-8", errors="replace")
+            src.seek(0)
+            if self.compression == "zstd":
+                with open(temp_path, "wb") as raw, zstandard.ZstdCompressor(level=10).stream_writer(raw) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            else:
+                with gzip.open(temp_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(temp_path, destination)
+        return _first_timestamp(first_line)
+
+    def _archive(self, source, reason, name=None):
+        name = name or self._archive_name()
+        destination = os.path.join(self.archive_dir, name)
+        size = os.path.getsize(source)
+        started = self._compress(source, destination)
+        archived_size = os.path.getsize(destination)
+        entry = {
+            "file": name,
+            "program": self.program,
+            "reason": reason,
+            "started": started,
+            "archived": datetime.fromtimestamp(os.path.getmtime(source)).isoformat(),
+            "size": size,
+            "archived_size": archived_size,
+        }
+        os.unlink(source)
+        with self.index_lock:
+            sessions = load_index(self.archive_dir)
+            sessions.append(entry)
+            sessions.sort(key=lambda session: session["archived"])
+            self._write_index(self._apply_retention(sessions))
+        self.stats["archived"] += 1
+        self.stats["bytes_in"] += size
+        self.stats["bytes_out"] += archived_size
+        return entry
+
+    def _apply_retention(self, sessions):
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat() if self.max_age_days else None
+        total = sum(session["archived_size"] for session in sessions)
+        kept = list(sessions)
+        while kept:
+            oldest = kept[0]
+            too_many = self.max_files and len(kept) > self.max_files
+            too_big = self.max_bytes and total > self.max_bytes and len(kept) > 1
+            too_old = cutoff is not None and oldest["archived"] < cutoff
+            if not (too_many or too_big or too_old):
+                break
+            kept.pop(0)
+            total -= oldest["archived_size"]
+            try:
+                os.unlink(os.path.join(self.archive_dir, oldest["file"]))
+            except FileNotFoundError:
+                pass
+            self.stats["removed"] += 1
+        return kept
+
+    def _write_index(self, sessions):
+        path = os.path.join(self.archive_dir, INDEX_FILE)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"program": self.program, "sessions": sessions}, file, indent=1)
+        os.replace(temp_path, path)
+
+    def _pending_files(self):
+        """
+        .part files from an interrupted run and plain .log archives written before the index existed.
+        """
+        indexed = {session["file"] for session in load_index(self.archive_dir)}
+        parts, legacy = [], []
+        for name in sorted(os.listdir(self.archive_dir)):
+            if name.startswith(f".{self.program}-") and name.endswith(PART_SUFFIX):
+                parts.append(os.path.join(self.archive_dir, name))
+            elif name.endswith(".log") and name not in indexed:
+                legacy.append(os.path.join(self.archive_dir, name))
+        return parts, legacy
+
+    def _run(self):
+        while True:
+            source = self._jobs.get()
+            if source is None:
+                return
+            try:
+                if source.endswith(PART_SUFFIX):
+                    reason = os.path.basename(source)[:-len(PART_SUFFIX)].rsplit("-", 1)[-1]
+                    self._archive(source, reason)
+                else:
+                    # Keep the original session name of a legacy archive
+                    self._archive(source, "legacy", name=f"{os.path.basename(source)}{'.zst' if self.compression == 'zstd' else '.gz'}")
+            except Exception as e:
+                self.stats["failures"] += 1
+                logging.error(f"Failed to archive log {source}: {e}")
+
+    def start(self):
+        if self._worker is not None:
+            return self
+        parts, legacy = self._pending_files()
+        for path in parts + legacy:
+            self._jobs.put(path)
+        self._worker = Thread(target=self._run, name=f"log-archiver-{self.program}", daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self, wait=True):
+        """
+        Finishes the queued archives (wait=True) and stops the worker thread.
+        """
+        if self._worker is None:
+            return
+        self._jobs.put(None)
+        if wait:
+            self._worker.join()
+        self._worker = None
+
+    def sessions(self):
+        return load_index(self.archive_dir)
+
+
+if __name__ == "__main__":
+    # python log_archiver.py <archive_dir> [show <file>]
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("logs", "past-logs", "Autosave")
+    if len(sys.argv) > 3 and sys.argv[2] == "show":
+        with open_archive(os.path.join(archive_dir, sys.argv[3])) as file:
+            shutil.copyfileobj(file, sys.stdout)
+    else:
+        for session in load_index(archive_dir):
+            print(f"{session['file']:<45} {session['reason']:<9} started {session['started']}  "
+                  f"{session['size']:>9} -> {session['archived_size']:>8} bytes")
@@ -0,0 +1,130 @@
+import os
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from config import LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROTATE_WHEN, LOG_BATCH_SIZE
+
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+_queue = None
+_queue_handler = None
+_archiver = None
+
+
+class _BatchedFlushMixin:
+    """
+    Defers the flush StreamHandler.emit does after every record. The stream is flushed every
+    `batch_size` records and whenever the listener has drained the queue, so a burst of records
+    costs one write to disk instead of one per line.
+    """
+    def _init_batching(self, batch_size):
+        self.batch_size = max(1, batch_size)
+        self.pending = 0
+
+    def flush(self):
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush_now()
+
+    def flush_now(self):
+        self.pending = 0
+        super().flush()
+
+
+class BatchedRotatingFileHandler(_BatchedFlushMixin, RotatingFileHandler):
+    def __init__(self, filename, max_bytes, backup_count, batch_size):
+        super().__init__(filename, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._init_batching(batch_size)
+
+
+class BatchedTimedRotatingFileHandler(_BatchedFlushMixin, TimedRotatingFileHandler):
+    def __init__(self, filename, when, backup_count, batch_size):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8")
+        self._init_batching(batch_size)
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that flushes its file handlers once the queue is empty.
+    """
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                if hasattr(handler, "flush_now"):
+                    handler.flush_now()
+
+
+def setup_logging(log_file, level=logging.INFO, fmt=DEFAULT_FORMAT, mode="w", max_bytes=LOG_MAX_BYTES,
+                  backup_count=LOG_BACKUP_COUNT, when=LOG_ROTATE_WHEN, batch_size=LOG_BATCH_SIZE, console=False,
+                  archiver=None):
+    """
+    Routes every record of the root logger through a queue to a background listener thread
+    that owns the file (and optionally console) handlers, so logging calls on the working
+    threads only enqueue. The log file rotates by size (max_bytes) or, when `when` is set
+    ('midnight', 'h', ...), by time. mode="w" starts a fresh file for this session.
+    With a LogArchiver, rolled segments and the session's log (at stop_logging) are compressed
+    into the archive, and a log left over from a crashed run is archived before it is replaced.
+    Returns the running QueueListener.
+    """
+    global _listener, _queue, _queue_handler, _archiver
+    stop_logging()
+
+    log_file = os.fspath(log_file)
+    os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+    if archiver is not None:
+        _archiver = archiver.start()
+        archiver.recover(log_file)
+        backup_count = max(backup_count, 1)  # Handlers only call the rotator when backups are enabled
+    if mode == "w":
+        open(log_file, "w").close()  # Rotating handlers always append
+
+    if when:
+        file_handler = BatchedTimedRotatingFileHandler(log_file, when, backup_count, batch_size)
+    else:
+        file_handler = BatchedRotatingFileHandler(log_file, max_bytes, backup_count, batch_size)
+    if archiver is not None:
+        file_handler.rotator = archiver.rotator
+    handlers = [file_handler]
+    if console:
+        handlers.append(logging.StreamHandler())
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue = queue.Queue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = QueueHandler(_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = BatchingQueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """
+    Writes the remaining records and stops the listener thread.
+    With an archiver, the closed log file is then archived and the archiver stopped.
+    """
+    global _listener, _queue_handler, _archiver
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = None
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    if _archiver is not None:
+        _archiver.hand_off(_listener.handlers[0].baseFilename)
+        _archiver.stop()
+        _archiver = None
+    _listener = None
+
+
+atexit.register(stop_logging)
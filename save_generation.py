@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import logging
+from config import SAVE_LOCK_FILE, SAVE_STATE_FILE, SAVE_LOCK_TIMEOUT
+from file_lock import FileRWLock, create_exclusive
+
+# Save states recorded in the lock and state files
+SAVING = "saving"
+SAVED = "saved"
+FAILED = "failed"
+
+
+def write_atomic(path, data):
+    """
+    Writes `data` to a temporary file next to `path`, fsyncs it and renames it into place,
+    so readers only ever see the old or the complete new content.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def read_save_state(path=SAVE_STATE_FILE):
+    """
+    Returns the {"generation", "state", "time"} record at `path`, or None if missing or unreadable.
+    """
+    try:
+        with open(path, "r") as file:
+            record = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or "generation" not in record:
+        return None
+    return record
+
+
+def current_generation(path=SAVE_STATE_FILE):
+    record = read_save_state(path)
+    return record["generation"] if record else 0
+
+
+def saved_generation(path=SAVE_STATE_FILE):
+    """
+    Generation of the last save if it succeeded, 0 if unknown or it failed.
+    """
+    record = read_save_state(path)
+    return record["generation"] if record and record.get("state") == SAVED else 0
+
+
+class SaveGeneration:
+    """
+    Writer side of the save-generation protocol used by autosave.
+    begin() takes the save FileRWLock exclusively (waiting for readers of the saved file),
+    bumps the generation and creates the lock file with O_EXCL in the "saving" state.
+    finish() durably records the outcome in SAVE_STATE_FILE, removes the lock file and only
+    then releases the FileRWLock, so a consumer that sees the lock disappear can read the new
+    generation right away and skip its reload when the generation did not advance (or the save
+    failed). A lock file found while holding the FileRWLock was left by a crashed saver.
+    """
+    def __init__(self, lock_file=SAVE_LOCK_FILE, state_file=SAVE_STATE_FILE, rwlock=None):
+        self.lock_file = lock_file
+        self.state_file = state_file
+        self.rwlock = rwlock or FileRWLock()
+        self.generation = max(current_generation(state_file), current_generation(lock_file))
+
+    def _record(self, state):
+        return {"generation": self.generation, "state": state, "time": time.time()}
+
+    def begin(self, timeout=SAVE_LOCK_TIMEOUT):
+        """
+        Starts a save. Raises TimeoutError if readers hold the lock for longer than `timeout`.
+        """
+        if not self.rwlock.acquire(exclusive=True, timeout=timeout):
+            raise TimeoutError(f"Save lock {self.rwlock.path} still held by readers or another save after {timeout}s")
+        try:
+            self.generation = max(self.generation, current_generation(self.state_file)) + 1
+            data = json.dumps(self._record(SAVING)).encode("utf-8")
+            try:
+                create_exclusive(self.lock_file, data)
+            except FileExistsError:
+                logging.warning(f"Removing stale lock file {self.lock_file} left by an interrupted save.")
+                os.unlink(self.lock_file)
+                create_exclusive(self.lock_file, data)
+        except Exception:
+            self.rwlock.release()
+            raise
+        return self.generation
+
+    def finish(self, saved=True):
+        try:
+            write_atomic(self.state_file, self._record(SAVED if saved else FAILED))
+            try:
+                os.unlink(self.lock_file)
+            except FileNotFoundError:
+                pass
+        finally:
+            self.rwlock.release()
@@ -0,0 +1,311 @@
+import os
+import sys
+import time
+import mmap
+import struct
+import logging
+from config import EXCEL_FILE, SCHEDULE_SNAPSHOT_FILE, SNAPSHOT_MAX_LESSONS, SNAPSHOT_STRINGS_SIZE
+from lesson import Lesson
+
+# Layout (little-endian, fixed size so readers never have to remap):
+#   header | SNAPSHOT_MAX_LESSONS records | string table (UTF-8 names)
+# The header's sequence is a seqlock: odd while the writer updates the file in place.
+MAGIC = b"GLSS"
+VERSION = 2
+# magic, version, record size, sequence, save generation, count, capacity, strings used, strings capacity,
+# mtime (ns) and size of the .xlsm the lessons were read from
+HEADER = struct.Struct("<4sHHQQIIIIqQ8x")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+RECORD = struct.Struct("<IIIbBHHiId6x")  # row, name offset, name length, day, flags, start, end, duration, people, rate
+
+# Record flags for optional fields
+HAS_NAME = 0x01
+HAS_START = 0x02
+HAS_END = 0x04
+HAS_DURATION = 0x08
+HAS_RATE = 0x10
+
+READ_RETRIES = 100  # Seqlock retries before a reader gives up on a snapshot being written
+
+
+def source_stamp(path=EXCEL_FILE):
+    """
+    (mtime in ns, size) of the workbook file, or (0, 0) if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return 0, 0
+    return stat.st_mtime_ns, stat.st_size
+
+
+def snapshot_size(capacity=SNAPSHOT_MAX_LESSONS, strings_capacity=SNAPSHOT_STRINGS_SIZE):
+    return HEADER.size + capacity * RECORD.size + strings_capacity
+
+
+def encode_lessons(lessons):
+    """
+    Packs lessons into (records bytes, string table bytes).
+    """
+    records, strings = bytearray(), bytearray()
+    for lesson in lessons:
+        flags = 0
+        offset, length = len(strings), 0
+        if lesson.name is not None:
+            name = str(lesson.name).encode("utf-8")
+            strings += name
+            length = len(name)
+            flags |= HAS_NAME
+        flags |= HAS_START if lesson.start_minute is not None else 0
+        flags |= HAS_END if lesson.end_minute is not None else 0
+        flags |= HAS_DURATION if lesson.duration is not None else 0
+        flags |= HAS_RATE if lesson.rate is not None else 0
+        records += RECORD.pack(
+            lesson.row or 0, offset, length, lesson.day, flags,
+            lesson.start_minute or 0, lesson.end_minute or 0, lesson.duration or 0,
+            lesson.people or 0, lesson.rate or 0.0,
+        )
+    return bytes(records), bytes(strings)
+
+
+def decode_lessons(records, strings):
+    """
+    Rebuilds Lesson objects from packed records and their string table.
+    """
+    lessons = []
+    for row, offset, length, day, flags, start, end, duration, people, rate in RECORD.iter_unpack(records):
+        lessons.append(Lesson(
+            name=strings[offset:offset + length].decode("utf-8") if flags & HAS_NAME else None,
+            day=day,
+            start_minute=start if flags & HAS_START else None,
+            end_minute=end if flags & HAS_END else None,
+            duration=duration if flags & HAS_DURATION else None,
+            people=people,
+            rate=rate if flags & HAS_RATE else None,
+            row=row,
+        ))
+    return lessons
+
+
+class ScheduleSnapshotWriter:
+    """
+    Publishes the lesson list into the shared snapshot file, in place.
+    The records and string table are packed first; the mapped file is then only touched between
+    the two sequence bumps of the seqlock, so a reader either sees a complete snapshot or retries.
+    Only the autosave process writes the snapshot.
+    """
+    def __init__(self, path=SCHEDULE_SNAPSHOT_FILE, capacity=SNAPSHOT_MAX_LESSONS, strings_capacity=SNAPSHOT_STRINGS_SIZE):
+        self.path = path
+        self.capacity = capacity
+        self.strings_capacity = strings_capacity
+        self.size = snapshot_size(capacity, strings_capacity)
+        self._file = None
+        self._map = None
+        self.stats = {"published": 0, "bytes": 0}
+
+    def _open(self):
+        if self._map is not None:
+            return self._map
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(HEADER.size)
+            magic, version, record_size = HEADER.unpack(header)[:3] if len(header) == HEADER.size else (None, None, None)
+            layout_ok = (magic, version, record_size) == (MAGIC, VERSION, RECORD.size) and os.path.getsize(self.path) == self.size
+        except FileNotFoundError:
+            layout_ok = False
+        if not layout_ok:
+            # New file or an older layout: write an empty snapshot and swap it in
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, 0, 0, self.capacity, 0, self.strings_capacity, 0, 0))
+                file.truncate(self.size)
+            os.replace(temp_path, self.path)
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), self.size)
+        return self._map
+
+    def publish(self, lessons, generation, stamp=None):
+        """
+        Replaces the snapshot with `lessons` for save `generation`. `stamp` is the source_stamp()
+        of the workbook file the lessons were read from (taken now if omitted); readers ignore
+        the snapshot once the file on disk no longer matches it.
+        """
+        mtime, size = stamp or source_stamp()
+        records, strings = encode_lessons(lessons)
+        if len(lessons) > self.capacity or len(strings) > self.strings_capacity:
+            raise ValueError(f"{len(lessons)} lessons / {len(strings)} name bytes exceed the snapshot capacity "
+                             f"({self.capacity} / {self.strings_capacity})")
+        view = self._open()
+        sequence = SEQUENCE.unpack_from(view, SEQUENCE_OFFSET)[0]
+        sequence += sequence & 1  # A writer that died mid-update left it odd
+        records_start = HEADER.size
+        strings_start = records_start + self.capacity * RECORD.size
+
+        SEQUENCE.pack_into(view, SEQUENCE_OFFSET, sequence + 1)
+        view[records_start:records_start + len(records)] = records
+        view[strings_start:strings_start + len(strings)] = strings
+        HEADER.pack_into(view, 0, MAGIC, VERSION, RECORD.size, sequence + 1, generation,
+                         len(lessons), self.capacity, len(strings), self.strings_capacity, mtime, size)
+        SEQUENCE.pack_into(view, SEQUENCE_OFFSET, sequence + 2)
+        view.flush()
+
+        self.stats["published"] += 1
+        self.stats["bytes"] = len(records) + len(strings)
+        logging.info(f"Schedule snapshot published: {len(lessons)} lessons, generation {generation}.")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+
+class ScheduleSnapshot:
+    """
+    Read-only view of the snapshot published by the autosave.
+    The file is mapped once; read() copies the used bytes between two reads of the seqlock
+    sequence and only decodes them when the sequence moved, so an unchanged snapshot costs two
+    stats and an 8-byte read. Returns None while no valid snapshot exists, or while the workbook
+    file `source` on disk no longer has the mtime and size the snapshot was read from.
+    """
+    def __init__(self, path=SCHEDULE_SNAPSHOT_FILE, source=EXCEL_FILE):
+        self.path = path
+        self.source = source
+        self._map = None
+        self._file_id = None
+        self._sequence = None
+        self._cached = None  # (generation, lessons) of self._sequence
+        self._stamp = None  # Workbook (mtime, size) of self._cached
+        self.stats = {"reads": 0, "decodes": 0, "retries": 0, "stale": 0}
+
+    def _view(self):
+        """
+        Maps the file, remapping if the writer replaced it. Returns None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_dev, stat.st_ino, stat.st_size)
+        if self._map is None or file_id != self._file_id:
+            self.close()
+            if stat.st_size < HEADER.size:
+                return None
+            with open(self.path, "rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._file_id = file_id
+            self._sequence = self._cached = None
+        return self._map
+
+    def _stable_copy(self, view):
+        """
+        Returns (sequence, header fields, records bytes, strings bytes) of one consistent version.
+        """
+        for _ in range(READ_RETRIES):
+            sequence = SEQUENCE.unpack_from(view, SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                self.stats["retries"] += 1
+                time.sleep(0)
+                continue
+            if sequence == self._sequence:
+                return sequence, None, None, None
+            header = HEADER.unpack_from(view, 0)
+            _, _, _, _, _, count, capacity, strings_used, _, _, _ = header
+            records_start = HEADER.size
+            strings_start = records_start + capacity * RECORD.size
+            records = view[records_start:records_start + count * RECORD.size]
+            strings = view[strings_start:strings_start + strings_used]
+            if SEQUENCE.unpack_from(view, SEQUENCE_OFFSET)[0] == sequence:
+                return sequence, header, records, strings
+            self.stats["retries"] += 1
+        return None
+
+    def read(self):
+        """
+        Returns (save generation, lessons) of the current snapshot, or None if there is none or
+        it does not match the workbook on disk.
+        The lessons list is shared between calls until the snapshot changes; do not modify it.
+        """
+        snapshot = self._read()
+        if snapshot is not None and self._stamp != source_stamp(self.source):
+            self.stats["stale"] += 1
+            return None
+        return snapshot
+
+    def _read(self):
+        view = self._view()
+        if view is None:
+            return None
+        self.stats["reads"] += 1
+        if view[:4] != MAGIC:
+            return None
+        copy = self._stable_copy(view)
+        if copy is None:
+            logging.error(f"Schedule snapshot {self.path} stayed locked by its writer. Ignoring it.")
+            return None
+        sequence, header, records, strings = copy
+        if header is None:
+            return self._cached
+        _, version, record_size, _, generation, _, _, _, _, mtime, size = header
+        if version != VERSION or record_size != RECORD.size or sequence == 0:
+            return None
+        self._cached = (generation, decode_lessons(records, strings))
+        self._stamp = (mtime, size)
+        self._sequence = sequence
+        self.stats["decodes"] += 1
+        return self._cached
+
+    def generation(self):
+        """
+        Save generation of the current snapshot (0 if there is none).
+        """
+        snapshot = self.read()
+        return snapshot[0] if snapshot else 0
+
+    def wait_for(self, generation, timeout):
+        """
+        Waits up to `timeout` seconds for the snapshot of save `generation` (or newer), which the
+        autosave publishes shortly after the lock file is removed. Returns (generation, lessons),
+        or None if there is no snapshot at all, it did not catch up in time, or it is of that
+        generation but the workbook file was changed since (e.g. restored outside the autosave).
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            snapshot = self._read()
+            if snapshot is None:
+                return None
+            if snapshot[0] >= generation:
+                return self.read()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.1)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+if __name__ == "__main__":
+    # python schedule_snapshot.py [publish]
+    #   show the current snapshot, or publish one from the saved workbook (no autosave needed)
+    if sys.argv[1:] == ["publish"]:
+        from config import FILE_READER_BACKEND
+        from lesson_cache import LessonCache
+        from save_generation import current_generation
+
+        cache = LessonCache(backend=FILE_READER_BACKEND)
+        stamp = source_stamp()
+        ScheduleSnapshotWriter().publish(cache.load(), current_generation(), stamp)
+    snapshot = ScheduleSnapshot().read()
+    if snapshot is None:
+        print(f"No schedule snapshot at {SCHEDULE_SNAPSHOT_FILE}")
+    else:
+        generation, lessons = snapshot
+        print(f"Generation {generation}: {len(lessons)} lessons")
+        for lesson in lessons:
+            print(f"  {lesson!r}")
@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import socket
+import logging
+from threading import Thread, Event
+from config import TRIGGER_CHANNEL_ADDRESS, TRIGGER_SEQUENCE_RESET_GAP, TRIGGER_SEQUENCE_RESET_IDLE
+
+# Typed events sent by the workbook's VBA
+EDIT = "edit"    # A cell was edited: (re)start the autosave debounce
+READY = "ready"  # Excel left edit mode / the statusbar is idle
+BUSY = "busy"    # Excel is in edit mode or busy: do not save now
+EVENTS = (EDIT, READY, BUSY)
+
+if os.name == "nt":
+    try:
+        import win32pipe
+        import win32file
+        import pywintypes
+    except ImportError:  # Trigger files only
+        win32pipe = None
+
+
+def parse_message(line):
+    """
+    Parses one "<event> [<sequence>]" line. Returns (event, sequence or None), or None if invalid.
+    """
+    parts = line.strip().lower().split()
+    if not parts or parts[0] not in EVENTS:
+        return None
+    sequence = None
+    if len(parts) > 1:
+        try:
+            sequence = int(parts[1])
+        except ValueError:
+            return None
+    return parts[0], sequence
+
+
+class TriggerChannel:
+    """
+    Listener for the workbook's trigger events.
+    The VBA writes one line per event ("edit", "ready", "busy", optionally followed by an
+    increasing sequence number) to a named pipe on Windows, or a Unix socket elsewhere:
+
+        Open "\\\\.\\pipe\\guitar-lesson-triggers" For Append As #1
+        Print #1, "edit " & seq
+        Close #1
+
+    Connections are served one at a time and every event is passed to the subscribers on the
+    listener thread, so they arrive once and in order. A sequence number that does not advance
+    is dropped as a duplicate, unless it fell back by TRIGGER_SEQUENCE_RESET_GAP or more, or
+    the last one is older than TRIGGER_SEQUENCE_RESET_IDLE seconds: the workbook was reopened
+    and its writer started counting again, so deduplication restarts from it. When the pipe is not available the VBA keeps writing the trigger
+    text files, which remain watched as before.
+    """
+    def __init__(self, address=TRIGGER_CHANNEL_ADDRESS):
+        self.address = address
+        self.subscribers = []
+        self.last_sequence = None
+        self.last_sequence_time = None  # time.monotonic() of last_sequence
+        self.stop_flag = Event()
+        self._thread = None
+        self._server = None
+        self.stats = {"connections": 0, "events": 0, "duplicates": 0, "invalid": 0, "sessions": 0}
+
+    def subscribe(self, callback):
+        """
+        Registers callback(event) for EDIT / READY / BUSY.
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def _deliver(self, line):
+        message = parse_message(line)
+        if message is None:
+            if line.strip():
+                self.stats["invalid"] += 1
+                logging.error(f"Ignoring invalid trigger message: {line.strip()!r}")
+            return
+        event, sequence = message
+        if sequence is not None:
+            now = time.monotonic()
+            if self.last_sequence is not None and sequence <= self.last_sequence:
+                if (self.last_sequence - sequence < TRIGGER_SEQUENCE_RESET_GAP
+                        and now - self.last_sequence_time < TRIGGER_SEQUENCE_RESET_IDLE):
+                    self.stats["duplicates"] += 1
+                    return
+                self.stats["sessions"] += 1
+                logging.info(f"Trigger sequence went back from {self.last_sequence} to {sequence}. New writer session.")
+            self.last_sequence = sequence
+            self.last_sequence_time = now
+        self.stats["events"] += 1
+        for callback in list(self.subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"Trigger subscriber failed on {event}: {e}")
+
+    def _read_lines(self, chunks):
+        buffer = b""
+        for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self._deliver(line.decode("utf-8", errors="replace"))
+        if buffer:
+            self._deliver(buffer.decode("utf-8", errors="replace"))
+
+    # Windows: named pipe
+
+    def _pipe_chunks(self, pipe):
+        while True:
+            try:
+                _, data = win32file.ReadFile(pipe, 4096)
+            except pywintypes.error:
+                return  # Writer closed the pipe
+            if not data:
+                return
+            yield data
+
+    def _serve_pipe(self):
+        while not self.stop_flag.is_set():
+            pipe = win32pipe.CreateNamedPipe(
+                self.address,
+                win32pipe.PIPE_ACCESS_INBOUND,
+                win32pipe.PIPE_TYPE_BYTE | win32pipe.PIPE_READMODE_BYTE | win32pipe.PIPE_WAIT,
+                win32pipe.PIPE_UNLIMITED_INSTANCES, 65536, 65536, 0, None,
+            )
+            try:
+                win32pipe.ConnectNamedPipe(pipe, None)
+                if self.stop_flag.is_set():
+                    return
+                self.stats["connections"] += 1
+                self._read_lines(self._pipe_chunks(pipe))
+            except pywintypes.error as e:
+                logging.error(f"Trigger pipe error: {e}")
+            finally:
+                win32file.CloseHandle(pipe)
+
+    # Elsewhere: Unix socket
+
+    def _socket_chunks(self, conn):
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                return
+            yield data
+
+    def _serve_socket(self):
+        while not self.stop_flag.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return  # Server socket closed
+            with conn:
+                self.stats["connections"] += 1
+                self._read_lines(self._socket_chunks(conn))
+
+    def start(self):
+        """
+        Starts listening. Returns False (trigger files only) if the channel cannot be opened.
+        """
+        try:
+            if os.name == "nt":
+                if win32pipe is None:
+                    raise OSError("pywin32 is not installed")
+                target = self._serve_pipe
+            else:
+                if os.path.exists(self.address):
+                    os.unlink(self.address)  # Stale socket from a previous run
+                self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._server.bind(self.address)
+                self._server.listen()
+                target = self._serve_socket
+        except OSError as e:
+            logging.error(f"Trigger channel unavailable ({e}). Using trigger files only.")
+            return False
+        self._thread = Thread(target=target, name="trigger-channel", daemon=True)
+        self._thread.start()
+        logging.info(f"Listening for trigger events on {self.address}")
+        return True
+
+    def stop(self):
+        self.stop_flag.set()
+        if self._server is not None:
+            self._server.close()
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        elif self._thread is not None:
+            try:
+                send()  # Wake the pipe server blocked in ConnectNamedPipe
+            except OSError:
+                pass
+
+
+def send(*events, address=TRIGGER_CHANNEL_ADDRESS):
+    """
+    Writes events to the channel the way the VBA does (one line each, one connection).
+    """
+    data = "".join(f"{event}\n" for event in events).encode("utf-8")
+    if os.name == "nt":
+        with open(address, "wb") as pipe:
+            pipe.write(data)
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(address)
+        conn.sendall(data)
+
+
+if __name__ == "__main__":
+    # Stand-in for the workbook's VBA writer:
+    #   python trigger_channel.py edit|ready|busy [...]   send events
+    #   python trigger_channel.py emulate                 busy, a burst of edits, then ready
+    args = sys.argv[1:] or ["emulate"]
+    if args == ["emulate"]:
+        sequence = int(time.time() * 1000)
+        script = [(BUSY, 0.0)] + [(EDIT, 0.2)] * 5 + [(READY, 0.5)]
+        for event, delay in script:
+            time.sleep(delay)
+            sequence += 1
+            send(f"{event} {sequence}")
+            print(f"sent {event} {sequence}")
+    else:
+        send(*args)
@@ -0,0 +1,117 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from config import get_logger
+
+logger = get_logger("weekly_schedule")
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+WEEKDAY_MAP = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+
+
+def weekday_index(weekday):
+    """
+    Maps a weekday name from the sheet ('Saturday', ' saturday ') to 0-6, or -1 if invalid.
+    """
+    if not isinstance(weekday, str):
+        return -1
+    return WEEKDAY_MAP.get(weekday.strip().lower(), -1)
+
+
+def minute_of_week(moment):
+    """
+    Minutes since Monday 00:00 for a datetime, including the fractional seconds.
+    """
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute + moment.second / 60
+
+
+def week_start(moment):
+    """
+    Monday 00:00 of the week containing `moment`.
+    """
+    return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class WeeklySchedule:
+    """
+    Sorted minute-of-week index over a set of lessons.
+    Every lesson is converted once into a [start, end) interval measured in minutes since
+    Monday 00:00; "next lesson after t" and "lesson covering t" are then answered with bisect.
+    Intervals that run past Sunday midnight wrap around to Monday.
+    Build a new index whenever the lesson set changes.
+    """
+    def __init__(self, lessons):
+        entries = []
+        for lesson in lessons:
+            if lesson.day == -1 or lesson.start_minute is None:
+                logger.error("Invalid weekday or start time for lesson '%s'. Skipping.", lesson.name)
+                continue
+
+            start = lesson.day * MINUTES_PER_DAY + lesson.start_minute
+            if lesson.end_minute is not None:
+                end = lesson.day * MINUTES_PER_DAY + lesson.end_minute
+                if end < start:
+                    end += MINUTES_PER_DAY  # Lesson runs past midnight
+            else:
+                end = start
+            entries.append((start, end, lesson))
+
+        entries.sort(key=lambda entry: entry[0])
+        self.starts = [entry[0] for entry in entries]
+        self.ends = [entry[1] for entry in entries]
+        self.lessons = [entry[2] for entry in entries]
+
+        # Running maximum of the end minutes lets lesson_at stop scanning early
+        self.max_ends = []
+        latest = float("-inf")
+        for end in self.ends:
+            latest = max(latest, end)
+            self.max_ends.append(latest)
+
+    def __len__(self):
+        return len(self.lessons)
+
+    def next_lesson(self, now=None):
+        """
+        Returns (lesson, lesson_datetime) for the first lesson starting after `now`, or None.
+        """
+        if not self.lessons:
+            return None
+        now = now or datetime.now()
+        minute = minute_of_week(now)
+
+        index = bisect_right(self.starts, minute)
+        weeks_ahead = 0
+        if index == len(self.starts):
+            index, weeks_ahead = 0, 1  # Wrap around to next week's first lesson
+
+        lesson_datetime = week_start(now) + timedelta(weeks=weeks_ahead, minutes=self.starts[index])
+        return self.lessons[index], lesson_datetime
+
+    def lesson_at(self, now=None):
+        """
+        Returns (lesson, end_datetime) for the lesson in session at `now`, or None.
+        """
+        if not self.lessons:
+            return None
+        now = now or datetime.now()
+        minute = minute_of_week(now)
+
+        # Lessons that wrapped past Sunday midnight also cover the start of the week
+        for offset, probe in ((0, minute), (-1, minute + MINUTES_PER_WEEK)):
+            index = bisect_right(self.starts, probe) - 1
+            while index >= 0 and self.max_ends[index] > probe:
+                if self.starts[index] <= probe < self.ends[index]:
+                    end_datetime = week_start(now) + timedelta(weeks=offset, minutes=self.ends[index])
+                    return self.lessons[index], end_datetime
+                index -= 1
+        return None
@@ -0,0 +1,583 @@
+import os
+import time
+import hashlib
+import logging
+from threading import Lock, get_ident, enumerate as enumerate_threads
+from datetime import date, datetime, time as dt_time, timedelta
+from config import EXCEL_FILE, EXCEL_SHEET, EXCEL_COLUMNS, EXCEL_DATA_RANGE, EXCEL_USED_RANGE, FAKE_RANGE_LATENCY
+
+COLUMN_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def column_index(letters):
+    """
+    Converts column letters ('A', 'Z', 'AA') to a 1-based column number.
+    """
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + (ord(letter) - ord("A") + 1)
+    return number
+
+
+def column_letters(number):
+    """
+    Converts a 1-based column number back to its letters.
+    """
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def parse_address(address):
+    """
+    Parses 'G12' or 'A2:Z501' into (first_row, first_col, last_row, last_col), 1-based.
+    """
+    bounds = []
+    for ref in address.replace("$", "").split(":"):
+        index = 0
+        while index < len(ref) and ref[index].isalpha():
+            index += 1
+        bounds.append((int(ref[index:]), column_index(ref[:index])))
+    (first_row, first_col), (last_row, last_col) = bounds[0], bounds[-1]
+    return first_row, first_col, last_row, last_col
+
+
+def to_excel_serial(value):
+    """
+    Converts openpyxl date/time values back to Excel serial numbers, the form xlwings and the
+    raw sheet XML return them in. Other values are passed through unchanged.
+    """
+    if isinstance(value, dt_time):
+        return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400
+    if isinstance(value, datetime):
+        return (value - datetime(1899, 12, 30)).total_seconds() / 86400
+    if isinstance(value, date):
+        return float((value - date(1899, 12, 30)).days)
+    return value
+
+
+def _column_offsets(data_range, columns):
+    _, first_col, _, _ = parse_address(data_range)
+    return {key: column_index(column) - first_col for key, column in columns.items()}
+
+
+def read_lesson_rows(sheet, data_range=EXCEL_DATA_RANGE, columns=EXCEL_COLUMNS):
+    """
+    Reads `data_range` in one range call and returns {row: {column key: value}} for the lesson
+    rows, in order, up to the first blank name. Shared by every reader of the schedule.
+    """
+    first_row, _, _, _ = parse_address(data_range)
+    offsets = _column_offsets(data_range, columns)
+    rows = {}
+    values = sheet.range(data_range).options(ndim=2).value or []
+    for offset, values_row in enumerate(values):
+        name = values_row[offsets["name"]]
+        if not name or str(name).strip() == "":
+            break
+        rows[first_row + offset] = {key: values_row[index] for key, index in offsets.items()}
+    return rows
+
+
+def read_row_spans(sheet, rows, data_range=EXCEL_DATA_RANGE, columns=EXCEL_COLUMNS):
+    """
+    Reads the given rows of `data_range`'s columns, one range call per run of consecutive rows.
+    Returns {row: {column key: value}}.
+    """
+    _, first_col, _, last_col = parse_address(data_range)
+    first_letter, last_letter = column_letters(first_col), column_letters(last_col)
+    offsets = _column_offsets(data_range, columns)
+    result = {}
+    rows = sorted(rows)
+    start = 0
+    while start < len(rows):
+        end = start
+        while end + 1 < len(rows) and rows[end + 1] == rows[end] + 1:
+            end += 1
+        first, last = rows[start], rows[end]
+        values = sheet.range(f"{first_letter}{first}:{last_letter}{last}").options(ndim=2).value or []
+        for offset, values_row in enumerate(values):
+            result[first + offset] = {key: values_row[index] for key, index in offsets.items()}
+        start = end + 1
+    return result
+
+
+class CellRange:
+    """
+    Minimal stand-in for xlwings.Range: supports .options(ndim=...) and .value.
+    Single cells return a scalar, one-dimensional ranges a list and rectangles a list of rows,
+    the same shapes xlwings returns.
+    """
+    def __init__(self, sheet, address, ndim=None):
+        self.sheet = sheet
+        self.address = address
+        self.ndim = ndim
+
+    def options(self, ndim=None):
+        return CellRange(self.sheet, self.address, ndim=ndim)
+
+    @property
+    def value(self):
+        first_row, first_col, last_row, last_col = parse_address(self.address)
+        rows = self.sheet.read_block(first_row, first_col, last_row, last_col)
+
+        if self.ndim == 2:
+            return rows
+        if first_row == last_row and first_col == last_col:
+            return rows[0][0]
+        if first_row == last_row:
+            return rows[0]
+        if first_col == last_col:
+            return [values[0] for values in rows]
+        return rows
+
+
+class CellSheet:
+    """
+    Sheet facade over a dict of cell values keyed by address ('A2').
+    """
+    def __init__(self, name, cells=None):
+        self.name = name
+        self.cells = cells if cells is not None else {}
+
+    def range(self, address):
+        return CellRange(self, address)
+
+    def read_block(self, first_row, first_col, last_row, last_col):
+        letters = [column_letters(col) for col in range(first_col, last_col + 1)]
+        return [
+            [self.cells.get(f"{letter}{row}") for letter in letters]
+            for row in range(first_row, last_row + 1)
+        ]
+
+
+class ReadOnlyWorkbookError(PermissionError):
+    """
+    Raised when a workbook opened by a read-only file backend is asked to save.
+    """
+
+
+class FileWorkbook:
+    """
+    Workbook facade for the read-only file backends.
+    """
+    def __init__(self, fullname, sheets):
+        self.fullname = fullname
+        self.name = os.path.basename(fullname)
+        self.sheets = {sheet.name: sheet for sheet in sheets}
+
+    def save(self):
+        raise ReadOnlyWorkbookError(
+            f"Workbook '{self.name}' was read from the saved file by a read-only backend and cannot be saved. "
+            f"Save through the live Excel backend (xlwings) instead."
+        )
+
+
+class WorkbookBackend:
+    """
+    Base class for workbook backends. attach returns a (workbook, sheet) pair whose sheet
+    supports sheet.range(address).value and .options(ndim=2).value.
+    Retries and handle caching are handled by WorkbookConnection.
+    """
+    name = None
+    thread_affine = False  # True if a handle may only be used on the thread that attached it
+    saved_fingerprint = None  # Used-range fingerprint at the last mark_saved()
+
+    def attach(self):
+        """
+        Makes a single attempt to attach to the workbook. Raises on failure.
+        """
+        raise NotImplementedError
+
+    def probe(self, workbook, sheet):
+        """
+        Cheap liveness check for a previously attached handle. Must not raise.
+        """
+        return True
+
+    def fingerprint(self, workbook, sheet):
+        """
+        Cheap token that changes whenever the sheet content may have changed.
+        Returns None when the backend cannot tell without reading the cells.
+        """
+        return None
+
+    def content_fingerprint(self, sheet):
+        """
+        Hash of every value in the used range, read in one call.
+        """
+        values = sheet.range(EXCEL_USED_RANGE).options(ndim=2).value
+        return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).digest()
+
+    def is_dirty(self, workbook, sheet):
+        """
+        True when the workbook has changes that are not saved yet.
+        Compares the used range against its fingerprint at the last mark_saved(); a workbook
+        that was never marked is considered dirty.
+        """
+        return self.saved_fingerprint is None or self.content_fingerprint(sheet) != self.saved_fingerprint
+
+    def mark_saved(self, workbook, sheet):
+        """
+        Records the current content as saved.
+        """
+        self.saved_fingerprint = self.content_fingerprint(sheet)
+
+
+class XlwingsBackend(WorkbookBackend):
+    """
+    Attaches to the running Excel instance over COM (Windows only).
+    COM proxies belong to the apartment of the thread that created them, so every thread
+    attaches its own handle (see WorkbookConnection).
+    """
+    name = "xlwings"
+    thread_affine = True
+
+    def attach(self):
+        """
+        Starts or attaches to Excel and returns the workbook and sheet, with detailed state logging.
+        """
+        import xlwings as xw
+
+        try:
+            import pythoncom
+
+            pythoncom.CoInitialize()  # Worker threads need their own COM apartment
+        except ImportError:
+            pass
+
+        # Start or attach to Excel
+        if not xw.apps:
+            app = xw.App(visible=True)
+            print("Started a new Excel instance.")
+        else:
+            app = xw.apps.active
+            print(f"Attached to active Excel instance. Open workbooks: {len(app.books)}")
+
+        # Check if workbook exists
+        if not os.path.exists(EXCEL_FILE):
+            raise FileNotFoundError(f"Workbook not found at path: {EXCEL_FILE}")
+
+        # Open workbook or use an existing instance
+        workbook = next((wb for wb in app.books if wb.fullname == EXCEL_FILE), None)
+        if workbook is None:
+            print("Workbook not open. Opening now...")
+            workbook = app.books.open(EXCEL_FILE)
+        else:
+            print(f"Workbook is already open: {workbook.fullname}")
+
+        # List available sheets
+        sheet_names = [sheet.name for sheet in workbook.sheets]
+        print(f"Available sheets: {sheet_names}")
+
+        # Access the target sheet
+        if EXCEL_SHEET not in sheet_names:
+            raise ValueError(f"Sheet '{EXCEL_SHEET}' not found in workbook.")
+        sheet = workbook.sheets[EXCEL_SHEET]
+
+        print(f"Successfully accessed sheet: {sheet.name}")
+        return workbook, sheet
+
+    def probe(self, workbook, sheet):
+        # One COM round-trip: fails if Excel was closed or the workbook/sheet went away
+        try:
+            return sheet.name == EXCEL_SHEET
+        except Exception:
+            return False
+
+    def is_dirty(self, workbook, sheet):
+        # Excel tracks unsaved changes itself: one COM property read
+        return not workbook.api.Saved
+
+    def mark_saved(self, workbook, sheet):
+        pass  # Workbook.Saved is reset by Excel on save
+
+
+class FileBackend(WorkbookBackend):
+    """
+    Base class for backends that read a snapshot of the saved file.
+    A cached snapshot stays valid until the file's modification time changes.
+    """
+    def __init__(self):
+        self.attached_mtime = None
+
+    def attach(self):
+        if not os.path.exists(EXCEL_FILE):
+            raise FileNotFoundError(f"Workbook not found at path: {EXCEL_FILE}")
+        mtime = os.path.getmtime(EXCEL_FILE)
+        workbook, sheet = self.load()
+        self.attached_mtime = mtime
+        return workbook, sheet
+
+    def load(self):
+        raise NotImplementedError
+
+    def probe(self, workbook, sheet):
+        try:
+            return os.path.getmtime(EXCEL_FILE) == self.attached_mtime
+        except OSError:
+            return False
+
+    def fingerprint(self, workbook, sheet):
+        try:
+            stat = os.stat(EXCEL_FILE)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class OpenpyxlSheet:
+    """
+    Sheet facade over an openpyxl read-only worksheet.
+    """
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.name = worksheet.title
+
+    def range(self, address):
+        return CellRange(self, address)
+
+    def read_block(self, first_row, first_col, last_row, last_col):
+        rows = [
+            [to_excel_serial(value) for value in values]
+            for values in self.worksheet.iter_rows(
+                min_row=first_row, max_row=last_row, min_col=first_col, max_col=last_col, values_only=True
+            )
+        ]
+        # Read-only worksheets stop at the last stored row; pad to the requested shape
+        width = last_col - first_col + 1
+        rows = [values + [None] * (width - len(values)) for values in rows]
+        rows += [[None] * width for _ in range(last_row - first_row + 1 - len(rows))]
+        return rows
+
+
+class OpenpyxlBackend(FileBackend):
+    """
+    Reads the saved workbook with openpyxl in read-only mode (cached formula values).
+    """
+    name = "openpyxl"
+
+    def load(self):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(EXCEL_FILE, read_only=True, data_only=True, keep_vba=False)
+        if EXCEL_SHEET not in wb.sheetnames:
+            raise ValueError(f"Sheet '{EXCEL_SHEET}' not found in workbook.")
+        sheet = OpenpyxlSheet(wb[EXCEL_SHEET])
+        return FileWorkbook(EXCEL_FILE, [sheet]), sheet
+
+
+class ZipStreamBackend(FileBackend):
+    """
+    Reads the saved workbook by streaming its sheet XML (see lesson_source.LessonSource).
+    Only the EXCEL_COLUMNS cells are loaded; every other cell reads as None.
+    """
+    name = "zip"
+
+    def load(self):
+        from lesson_source import LessonSource
+
+        cells = {}
+        for row, values in LessonSource(EXCEL_FILE, EXCEL_SHEET).iter_rows(min_row=1):
+            for key, value in values.items():
+                if value is not None:
+                    cells[f"{EXCEL_COLUMNS[key]}{row}"] = value
+        sheet = CellSheet(EXCEL_SHEET, cells)
+        return FileWorkbook(EXCEL_FILE, [sheet]), sheet
+
+
+class FakeSheet(CellSheet):
+    """
+    In-memory sheet that counts range reads and sleeps `latency` seconds on each one,
+    simulating the cost of a cross-process COM call.
+    """
+    def __init__(self, name, cells=None, latency=0.0):
+        super().__init__(name, cells)
+        self.latency = latency
+        self.range_calls = 0
+        self.value_reads = 0
+        self.version = 0  # Bumped on every set_value, used as the backend fingerprint
+
+    def range(self, address):
+        self.range_calls += 1
+        return CellRange(self, address)
+
+    def read_block(self, first_row, first_col, last_row, last_col):
+        self.value_reads += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().read_block(first_row, first_col, last_row, last_col)
+
+    def set_value(self, address, value):
+        """
+        Writes one cell, like an edit made in Excel.
+        """
+        if value is None:
+            self.cells.pop(address, None)
+        else:
+            self.cells[address] = value
+        self.version += 1
+
+
+class FakeWorkbook:
+    """
+    In-memory workbook holding a single FakeSheet. save() only counts calls.
+    """
+    def __init__(self, sheet, fullname=EXCEL_FILE):
+        self.fullname = fullname
+        self.name = os.path.basename(fullname)
+        self.sheets = {sheet.name: sheet}
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+
+class FakeBackend(WorkbookBackend):
+    """
+    In-memory backend for tests and benchmarks. When no cells are given it is seeded with the
+    cached values of the lesson workbook on disk (if present), so it behaves like the real sheet.
+    """
+    name = "fake"
+
+    def __init__(self, cells=None, latency=FAKE_RANGE_LATENCY):
+        if cells is None:
+            cells = self._seed_cells()
+        self.sheet = FakeSheet(EXCEL_SHEET, cells, latency)
+        self.workbook = FakeWorkbook(self.sheet)
+        self.attach_calls = 0
+        self.probe_calls = 0
+        self.alive = True  # Set to False to simulate Excel going away
+
+    def _seed_cells(self):
+        if not os.path.exists(EXCEL_FILE):
+            return {}
+        from lesson_source import LessonSource
+
+        columns = {letter: letter for letter in COLUMN_LETTERS}
+        cells = {}
+        for row, values in LessonSource(EXCEL_FILE, EXCEL_SHEET, columns).iter_rows(min_row=1):
+            for letter, value in values.items():
+                if value is not None:
+                    cells[f"{letter}{row}"] = value
+        return cells
+
+    def attach(self):
+        self.attach_calls += 1
+        return self.workbook, self.sheet
+
+    def probe(self, workbook, sheet):
+        self.probe_calls += 1
+        return self.alive
+
+    def fingerprint(self, workbook, sheet):
+        return sheet.version
+
+
+class WorkbookConnection:
+    """
+    Caches the (workbook, sheet) handle of one backend.
+    A cached handle is reused after a single liveness probe; the backend is only re-attached
+    when the probe fails, with exponential backoff between failed attempts. Probing and
+    re-attaching run under a lock, so threads sharing the connection never attach twice.
+    For thread-affine backends (xlwings/COM) the handle is cached per thread instead, so a
+    COM proxy is never used outside the apartment that created it.
+    """
+    def __init__(self, backend, max_delay=30):
+        self.backend = backend
+        self.max_delay = max_delay
+        self.handles = {}  # thread id (None unless thread-affine) -> (workbook, sheet)
+        self.lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "reattaches": 0, "attach_failures": 0}
+
+    def _key(self):
+        return get_ident() if self.backend.thread_affine else None
+
+    def invalidate(self):
+        with self.lock:
+            self.handles.clear()
+
+    def get(self, retries=3, delay=2):
+        """
+        Returns the cached handle if it is still alive, otherwise attaches (again).
+        """
+        with self.lock:
+            return self._get(retries, delay)
+
+    def _get(self, retries, delay):
+        key = self._key()
+        handle = self.handles.pop(key, None)
+        if handle is not None:
+            if self.backend.probe(*handle):
+                self.stats["hits"] += 1
+                self.handles[key] = handle
+                return handle
+            logging.info(f"Cached '{self.backend.name}' workbook handle is stale. Re-attaching...")
+            self.stats["reattaches"] += 1
+        else:
+            self.stats["misses"] += 1
+            if key is not None:
+                # Drop the handles of threads that have exited
+                alive = {thread.ident for thread in enumerate_threads()}
+                for ident in [ident for ident in self.handles if ident not in alive]:
+                    del self.handles[ident]
+
+        for attempt in range(1, retries + 1):
+            try:
+                print(f"Initializing workbook and sheet (Attempt {attempt}/{retries})...")
+                handle = self.handles[key] = self.backend.attach()
+                return handle
+            except Exception as e:
+                self.stats["attach_failures"] += 1
+                print(f"Error during initialization: {e}")
+                if attempt < retries:
+                    wait = min(delay * 2 ** (attempt - 1), self.max_delay)
+                    print(f"Retrying in {wait} seconds...")
+                    time.sleep(wait)
+                else:
+                    print("Max retries reached. Aborting.")
+                    raise
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (XlwingsBackend, OpenpyxlBackend, ZipStreamBackend, FakeBackend)
+}
+_instances = {}
+_connections = {}
+_registry_lock = Lock()
+
+
+def get_backend(name):
+    """
+    Returns the shared backend instance registered under `name`.
+    """
+    if name not in _instances:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown workbook backend '{name}'. Choose one of: {sorted(BACKENDS)}")
+        _instances[name] = BACKENDS[name]()
+        logging.debug(f"Created workbook backend '{name}'.")
+    return _instances[name]
+
+
+def set_backend(name, backend):
+    """
+    Installs a preconfigured backend instance (e.g. a FakeBackend with custom cells or latency).
+    Any handle cached for the previous instance is dropped.
+    """
+    _instances[name] = backend
+    _connections.pop(name, None)
+    return backend
+
+
+def get_connection(name):
+    """
+    Returns the shared WorkbookConnection for the backend registered under `name`.
+    """
+    with _registry_lock:
+        if name not in _connections:
+            _connections[name] = WorkbookConnection(get_backend(name))
+        return _connections[name]